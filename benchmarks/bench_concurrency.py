@@ -0,0 +1,117 @@
+"""
+Конкуренция за блокировку ConcurrentLibrary при росте числа потоков.
+
+Каждый поток выполняет ops операций: доля --writes приходится на
+add_book/remove_book, остальное - поиск по ISBN, автору и году.
+Для сравнения тот же сценарий прогоняется на Library под одним
+общим мьютексом. Печатается пропускная способность и p99 задержки.
+
+    python benchmarks/bench_concurrency.py --threads 1 2 4 8 --writes 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src_work'))
+
+from library import Library
+from concurrent_library import ConcurrentLibrary
+from events import NullSink
+from simulation import percentile
+from bench_library import make_books
+
+
+class MutexLibrary:
+    """Library под одним мьютексом - базовая линия для сравнения"""
+    def __init__(self, library: Library):
+        self._library = library
+        self._mutex = threading.Lock()
+    
+    def __getattr__(self, name):
+        method = getattr(self._library, name)
+        
+        def locked(*args):
+            with self._mutex:
+                return method(*args)
+        return locked
+
+
+def worker(library, books: list, extra: list, ops: int, writes: float,
+           seed: int, latencies: list) -> None:
+    rng = random.Random(seed)
+    queries = (
+        lambda book: library.search_by_isbn(book.isbn),
+        lambda book: library.search_by_author(book.author),
+        lambda book: library.search_by_year(book.year),
+    )
+    timings = []
+    clock = time.perf_counter
+    added = []
+    for _ in range(ops):
+        started = clock()
+        if rng.random() < writes:
+            if added and rng.random() < 0.5:
+                library.remove_book(added.pop())
+            elif extra:
+                book = extra.pop()
+                library.add_book(book)
+                added.append(book)
+        else:
+            rng.choice(queries)(rng.choice(books))
+        timings.append(clock() - started)
+    latencies.extend(timings)
+
+
+def run(kind: str, threads: int, size: int, ops: int, writes: float) -> dict:
+    if kind == 'rwlock':
+        library = ConcurrentLibrary("Конкуренция", events=NullSink())
+    else:
+        library = Library("Конкуренция", events=NullSink())
+    books = make_books(size)
+    library.add_books(books)
+    if kind == 'mutex':
+        library = MutexLibrary(library)
+    
+    latencies: list = []
+    workers = []
+    for number in range(threads):
+        extra = make_books(ops, start=size + number * ops, seed=number)
+        workers.append(threading.Thread(
+            target=worker, args=(library, books, extra, ops, writes, number, latencies)))
+    
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        'ops_per_second': threads * ops / elapsed,
+        'p99_us': percentile(latencies, 99) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Конкуренция потоков за Library")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--size', type=int, default=100000, help="книг в каталоге")
+    parser.add_argument('--ops', type=int, default=20000, help="операций на поток")
+    parser.add_argument('--writes', type=float, default=0.05, help="доля записей")
+    args = parser.parse_args()
+    
+    print(f"{'потоков':>8}{'rwlock оп/с':>14}{'p99 мкс':>10}"
+          f"{'mutex оп/с':>14}{'p99 мкс':>10}")
+    for threads in args.threads:
+        rw = run('rwlock', threads, args.size, args.ops, args.writes)
+        mutex = run('mutex', threads, args.size, args.ops, args.writes)
+        print(f"{threads:>8}{rw['ops_per_second']:>14.0f}{rw['p99_us']:>10.1f}"
+              f"{mutex['ops_per_second']:>14.0f}{mutex['p99_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
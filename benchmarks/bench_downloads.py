@@ -0,0 +1,91 @@
+"""
+Учёт скачиваний: шардированные счётчики DownloadTracker против
+одного словаря под общей блокировкой, и запрос топа против полной
+сортировки каталога.
+
+    python benchmarks/bench_downloads.py --threads 1 2 4 8 --downloads 200000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src_work'))
+
+from downloads import DownloadTracker
+
+
+class LockedCounter:
+    """Один словарь под одной блокировкой - базовая линия"""
+    def __init__(self):
+        self._counts: dict = {}
+        self._lock = threading.Lock()
+    
+    def record(self, isbn: str) -> None:
+        with self._lock:
+            self._counts[isbn] = self._counts.get(isbn, 0) + 1
+    
+    def top(self, n: int) -> list:
+        with self._lock:
+            return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+def hammer(counter, threads: int, downloads: int, isbns: list) -> float:
+    per_thread = downloads // threads
+    
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        record = counter.record
+        keys = [isbns[min(int(rng.expovariate(0.001)), len(isbns) - 1)]
+                for _ in range(per_thread)]
+        barrier.wait()
+        for isbn in keys:
+            record(isbn)
+    
+    barrier = threading.Barrier(threads + 1)
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * per_thread / (time.perf_counter() - started)
+
+
+def timed_top(counter, n: int, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        counter.top(n)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Учёт скачиваний")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--downloads', type=int, default=200000)
+    parser.add_argument('--books', type=int, default=100000, help="электронных книг")
+    parser.add_argument('--top', type=int, default=100)
+    args = parser.parse_args()
+    
+    isbns = [f"EBOOK-{i}" for i in range(args.books)]
+    print(f"{'потоков':>8}{'tracker скач/с':>16}{'lock скач/с':>14}")
+    for threads in args.threads:
+        tracker = DownloadTracker(top_n=args.top)
+        locked = LockedCounter()
+        sharded_rate = hammer(tracker, threads, args.downloads, isbns)
+        locked_rate = hammer(locked, threads, args.downloads, isbns)
+        print(f"{threads:>8}{sharded_rate:>16.0f}{locked_rate:>14.0f}")
+    
+    # все книги хотя бы раз скачаны - сортировать приходится весь каталог
+    for isbn in isbns:
+        tracker.record(isbn)
+        locked.record(isbn)
+    print(f"\nтоп-{args.top}: tracker {timed_top(tracker, args.top):.0f} мкс, "
+          f"полная сортировка {timed_top(locked, args.top):.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Накладные расходы журнала изменений Library.
+
+Одна и та же нагрузка (add_book, borrow/return, remove_book)
+прогоняется без журнала и с журналом при разных group_size;
+печатается среднее время операции и число fsync.
+
+    python benchmarks/bench_journal.py --ops 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src_work'))
+
+from book import LibraryBook
+from library import Library
+from journal import Journal
+from events import NullSink
+from bench_library import make_books
+
+
+# (название, параметры Journal); None - без журнала
+CONFIGS = [
+    ('без журнала', None),
+    ('group_size=1024', {'group_size': 1024}),
+    ('group_size=64', {'group_size': 64}),
+    ('group_size=1', {'group_size': 1}),
+    ('без fsync', {'group_size': 64, 'fsync': False}),
+]
+
+
+def run(ops: int, options, directory: str) -> dict:
+    library = Library("Журнал", events=NullSink())
+    journal = None
+    if options is not None:
+        journal = Journal(os.path.join(directory, 'bench.journal'), **options)
+        library.attach_journal(journal)
+    
+    books = make_books(ops)
+    loans = [book for book in books if isinstance(book, LibraryBook)]
+    
+    started = time.perf_counter()
+    for book in books:
+        library.add_book(book)
+    for book in loans:
+        book.borrow("Читатель")
+    for book in loans:
+        book.return_book()
+    for book in books:
+        library.remove_book(book)
+    if journal is not None:
+        journal.close()
+    elapsed = time.perf_counter() - started
+    
+    count = len(books) * 2 + len(loans) * 2
+    result = {'per_op_us': elapsed / count * 1e6, 'syncs': journal.syncs if journal else 0}
+    if journal is not None:
+        os.remove(journal.path)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Накладные расходы журнала")
+    parser.add_argument('--ops', type=int, default=20000, help="число книг в прогоне")
+    parser.add_argument('--dir', help="каталог для файла журнала (по умолчанию временный)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        baseline = None
+        print(f"{'режим':<18}{'мкс/оп':>10}{'x':>8}{'fsync':>8}")
+        for name, options in CONFIGS:
+            result = run(args.ops, options, directory)
+            if baseline is None:
+                baseline = result['per_op_us']
+            print(f"{name:<18}{result['per_op_us']:>10.2f}"
+                  f"{result['per_op_us'] / baseline:>8.2f}{result['syncs']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Бенчмарк операций Library на каталогах разного размера.
+
+Для каждого размера замеряется среднее время операции и пиковая
+память (tracemalloc), результаты сохраняются в JSON. По соседним
+размерам оценивается показатель роста k в t ~ n^k; операция
+помечается, если k заметно выше ожидаемого.
+
+    python benchmarks/bench_library.py --sizes 1000 100000 1000000
+    python benchmarks/bench_library.py --compare old.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src_work'))
+
+from book import Book, LibraryBook, EBook
+from library import Library
+from events import NullSink
+
+
+GENRES = ["Роман", "Фантастика", "Детектив", "Приключения", "История",
+          "Поэзия", "Драма", "Сказка", "Биография", "Антиутопия"]
+WORDS = ["Тайна", "старого", "замка", "Путешествие", "во", "времени",
+         "Загадочный", "остров", "Город", "мечты", "Последний", "рубеж"]
+
+# Ожидаемый показатель роста времени операции от размера каталога.
+# Корзины автора держатся ~100 книг, а число жанров и лет фиксировано,
+# поэтому поиск по жанру и году растёт вместе с результатом.
+EXPECTED_GROWTH = {
+    'add_book': 0.0,
+    'remove_book': 0.0,
+    'get_random_book': 0.0,
+    'search_by_isbn': 0.0,
+    'search_by_author': 0.0,
+    'search_by_year': 1.0,
+    'search_by_year_range': 1.0,
+    'search_by_genre': 1.0,
+    'search_by_title': 1.0,
+    'rebuild_from_collection': 1.0,
+}
+GROWTH_TOLERANCE = 0.3
+# Операции быстрее этого порога не помечаются: там рост - это кэш процессора, а не алгоритм
+NOISE_FLOOR_US = 2.0
+
+
+def make_books(count: int, start: int = 0, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    today = date.today()
+    authors = max(1, count // 100)
+    books = []
+    for i in range(start, start + count):
+        title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} #{i}"
+        args = (title, f"Автор {rng.randrange(authors)}", rng.randint(1800, 2023),
+                rng.choice(GENRES), f"BENCH-{i}")
+        kind = i % 3
+        if kind == 0:
+            books.append(Book(*args, date_added=today))
+        elif kind == 1:
+            books.append(LibraryBook(*args, f"INV-{i}", "A1", date_added=today))
+        else:
+            books.append(EBook(*args, 1.5, "EPUB", date_added=today))
+    return books
+
+
+def _timed(operation) -> float:
+    started = time.perf_counter()
+    operation()
+    return time.perf_counter() - started
+
+
+def _traced(operation) -> float:
+    """Пиковая память прогона, КБ"""
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def _measure(operation, repeat: int) -> dict:
+    elapsed = _timed(operation)
+    return {'per_op_us': elapsed / repeat * 1e6, 'peak_kb': _traced(operation)}
+
+
+def bench_size(size: int, ops: int) -> dict:
+    rng = random.Random(size)
+    library = Library("Бенчмарк", events=NullSink())
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    library.add_books(make_books(size))
+    build_seconds = time.perf_counter() - started
+    _, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    books = list(library.get_all_books())
+    sample = [rng.choice(books) for _ in range(ops)]
+    extra = make_books(ops, start=size, seed=size)
+    results = {}
+    
+    def add_all():
+        for book in extra:
+            library.add_book(book)
+    
+    def remove_all():
+        for book in extra:
+            library.remove_book(book)
+    
+    # добавление и удаление чередуются, чтобы размер каталога не менялся
+    add_seconds, remove_seconds = _timed(add_all), _timed(remove_all)
+    add_peak, remove_peak = _traced(add_all), _traced(remove_all)
+    results['add_book'] = {'per_op_us': add_seconds / ops * 1e6, 'peak_kb': add_peak}
+    results['remove_book'] = {'per_op_us': remove_seconds / ops * 1e6, 'peak_kb': remove_peak}
+    
+    queries = {
+        'search_by_isbn': lambda book: library.search_by_isbn(book.isbn),
+        'search_by_author': lambda book: library.search_by_author(book.author),
+        'search_by_year': lambda book: library.search_by_year(book.year),
+        'search_by_year_range': lambda book: library.search_by_year_range(book.year, book.year + 5),
+        'search_by_genre': lambda book: library.search_by_genre(book.genre),
+        'search_by_title': lambda book: library.search_by_title(book.title.split('#')[-1]),
+        'get_random_book': lambda book: library.get_random_book(),
+    }
+    heavy = {'search_by_year', 'search_by_year_range', 'search_by_genre'}
+    for name, query in queries.items():
+        keys = sample[:max(1, ops // 20)] if name in heavy else sample
+        
+        def run(query=query, keys=keys):
+            for book in keys:
+                query(book)
+        
+        results[name] = _measure(run, len(keys))
+    
+    results['rebuild_from_collection'] = _measure(
+        lambda: library._index.rebuild_from_collection(library.get_all_books()), 1)
+    
+    return {
+        'build_seconds': build_seconds,
+        'build_peak_mb': build_peak / 1024 / 1024,
+        'operations': results,
+    }
+
+
+def _growth(runs: dict, name: str, small: int, large: int, expected: float) -> dict:
+    t_small = runs[str(small)]['operations'][name]['per_op_us']
+    t_large = runs[str(large)]['operations'][name]['per_op_us']
+    exponent = math.log(max(t_large, 1e-9) / max(t_small, 1e-9)) / math.log(large / small)
+    return {
+        'from': small,
+        'to': large,
+        'exponent': round(exponent, 3),
+        'expected': expected,
+        'flagged': exponent > expected + GROWTH_TOLERANCE and t_large > NOISE_FLOOR_US,
+    }
+
+
+def growth_report(sizes: list, runs: dict) -> dict:
+    """
+    Показатель роста между соседними размерами и по всему диапазону.
+    Помечается только рост по всему диапазону: на соседних размерах
+    сильно шумят прогрев и кэши.
+    """
+    report = {}
+    for name, expected in EXPECTED_GROWTH.items():
+        report[name] = {
+            'steps': [_growth(runs, name, small, large, expected)
+                      for small, large in zip(sizes, sizes[1:])],
+            'overall': _growth(runs, name, sizes[0], sizes[-1], expected),
+        }
+    return report
+
+
+def compare(previous: dict, current: dict) -> None:
+    print("\nСравнение с предыдущим прогоном (время: новое / старое):")
+    for size, run in current['runs'].items():
+        old_run = previous.get('runs', {}).get(size)
+        if old_run is None:
+            continue
+        for name, values in run['operations'].items():
+            old = old_run['operations'].get(name)
+            if old:
+                ratio = values['per_op_us'] / max(old['per_op_us'], 1e-9)
+                print(f"  n={size:>8} {name:<26} x{ratio:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк операций Library")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--ops', type=int, default=1000,
+                        help="число операций на замер")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="JSON предыдущего прогона")
+    args = parser.parse_args()
+    
+    sizes = sorted(set(args.sizes))
+    if len(sizes) < 2:
+        parser.error("нужно хотя бы два размера, чтобы оценить рост")
+    runs = {}
+    for size in sizes:
+        print(f"n={size} ...", flush=True)
+        runs[str(size)] = bench_size(size, min(args.ops, size))
+    
+    result = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'ops': args.ops,
+        },
+        'runs': runs,
+        'growth': growth_report(sizes, runs),
+    }
+    
+    print(f"\n{'операция':<26}" + "".join(f"{size:>14}" for size in sizes))
+    for name in EXPECTED_GROWTH:
+        row = "".join(f"{runs[str(size)]['operations'][name]['per_op_us']:>12.2f}us"
+                      for size in sizes)
+        flag = " !" if result['growth'][name]['overall']['flagged'] else ""
+        print(f"{name:<26}{row}{flag}")
+    
+    flagged = [name for name, growth in result['growth'].items()
+               if growth['overall']['flagged']]
+    if flagged:
+        print(f"\nРост выше ожидаемого: {', '.join(flagged)}")
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Генератор нагрузки для сервиса библиотеки (src_work/service.py).
+
+Поднимает сервис в отдельном процессе из снимка со сгенерированным
+каталогом (или подключается к --connect host:port) и открывает
+--clients соединений. Каждое держит до --pipeline запросов без
+ответа. Печатается пропускная способность и перцентили задержки от
+отправки запроса до получения ответа.
+
+    python benchmarks/bench_service.py --clients 16 --pipeline 8 --requests 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src_work'))
+
+from book import LibraryBook
+from library import Library
+from events import NullSink
+from simulation import percentile
+from bench_library import make_books
+
+
+SERVICE = os.path.join(os.path.dirname(__file__), '..', 'src_work', 'service.py')
+
+
+def make_request(rng: random.Random, books: list, loans: list, request_id: int) -> bytes:
+    book = rng.choice(books)
+    roll = rng.random()
+    if roll < 0.4:
+        op, args = 'search_by_isbn', {'isbn': book.isbn}
+    elif roll < 0.7:
+        op, args = 'search_by_author', {'author': book.author, 'limit': 10}
+    elif roll < 0.85:
+        op, args = 'count_by_year_range', {'start': book.year, 'end': book.year + 10}
+    elif roll < 0.93:
+        book = rng.choice(loans)
+        op, args = 'borrow', {'isbn': book.isbn, 'borrower': f"Читатель {request_id % 100}"}
+    else:
+        op, args = 'return_book', {'isbn': rng.choice(loans).isbn}
+    request = {'id': request_id, 'op': op, 'args': args}
+    return json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+async def client(host: str, port: int, requests: int, pipeline: int, books: list,
+                 seed: int, latencies: list, errors: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    loans = [book for book in books if isinstance(book, LibraryBook)]
+    sent: deque = deque()
+    clock = time.perf_counter
+    next_id = 0
+    
+    while next_id < requests or sent:
+        # окно конвейера: досылаем запросы одной записью
+        batch = []
+        while next_id < requests and len(sent) < pipeline:
+            batch.append(make_request(rng, books, loans, next_id))
+            sent.append(clock())
+            next_id += 1
+        if batch:
+            writer.write(b''.join(batch))
+        
+        line = await reader.readline()
+        if not line:
+            errors.append("соединение закрыто сервером")
+            break
+        latencies.append(clock() - sent.popleft())
+        if not json.loads(line).get('ok'):
+            errors.append(line)
+    
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load(host: str, port: int, clients: int, requests: int,
+               pipeline: int, books: list) -> dict:
+    latencies: list = []
+    errors: list = []
+    per_client = max(1, requests // clients)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, per_client, pipeline, books, seed,
+                                  latencies, errors)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_us': percentile(latencies, 50) * 1e6,
+        'p99_us': percentile(latencies, 99) * 1e6,
+        'p999_us': percentile(latencies, 99.9) * 1e6,
+        'errors': len(errors),
+    }
+
+
+def start_service(size: int, directory: str) -> tuple:
+    """Сервис в отдельном процессе; возвращает (процесс, порт)"""
+    library = Library("Сервис", events=NullSink())
+    library.add_books(make_books(size))
+    snapshot = os.path.join(directory, 'service.snap')
+    library.save_snapshot(snapshot)
+    
+    port_file = os.path.join(directory, 'service.port')
+    process = subprocess.Popen([sys.executable, SERVICE, '--snapshot', snapshot,
+                                '--port', '0', '--port-file', port_file])
+    # сервис записывает порт в файл, когда начал слушать
+    while not os.path.exists(port_file):
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервис завершился с кодом {process.returncode}")
+        time.sleep(0.05)
+    with open(port_file, encoding='utf-8') as f:
+        return process, int(f.read())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузка на сервис библиотеки")
+    parser.add_argument('--connect', help="host:port уже запущенного сервиса")
+    parser.add_argument('--size', type=int, default=100000, help="книг в каталоге")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--pipeline', type=int, default=8, help="запросов без ответа на соединение")
+    parser.add_argument('--requests', type=int, default=50000, help="всего запросов")
+    args = parser.parse_args()
+    
+    books = make_books(args.size)
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        if args.connect:
+            host, port = args.connect.rsplit(':', 1)
+            port = int(port)
+        else:
+            process, port = start_service(args.size, directory)
+            host = '127.0.0.1'
+        try:
+            result = asyncio.run(load(host, port, args.clients, args.requests,
+                                      args.pipeline, books))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    
+    print(f"запросов: {result['requests']}, ошибок: {result['errors']}")
+    print(f"пропускная способность: {result['requests_per_second']:.0f} запр/с")
+    print(f"задержка p50 {result['p50_us']:.0f} мкс, p99 {result['p99_us']:.0f} мкс, "
+          f"p99.9 {result['p999_us']:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
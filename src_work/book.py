@@ -1,18 +1,40 @@
-from datetime import datetime
+from datetime import date
+from typing import Optional, Tuple
 
 
 class Book: 
     """
     Базовый класс для любой книги.
+
+    Хранит поля в __slots__, без __dict__ на каждый экземпляр.
+    Дату добавления можно передать явно (например, одну на всю
+    пачку книг), иначе берётся сегодняшняя. _library - библиотека,
+    в которую книга добавлена; выдача и возврат идут через неё, чтобы
+    проверка, изменение книги и индексы менялись одним шагом. Связь
+    с библиотекой не копируется и не сериализуется: копия книги - это
+    новая книга, которую ещё нужно добавить.
     """
-    def __init__(self, title: str, author: str, year: int, genre: str, isbn: str):
+    __slots__ = ('title', 'author', 'year', 'genre', 'isbn',
+                 'is_available', 'date_added', '_library')
+    
+    def __init__(self, title: str, author: str, year: int, genre: str, isbn: str,
+                 date_added: Optional[date] = None):
         self.title = title
         self.author = author
         self.year = year
         self.genre = genre
         self.isbn = isbn
         self.is_available = True
-        self.date_added = datetime.now().date()
+        self.date_added = date_added if date_added is not None else date.today()
+        self._library = None
+    
+    def __getstate__(self) -> tuple:
+        """Состояние для pickle и copy: все слоты, кроме _library"""
+        state = {name: getattr(self, name)
+                 for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())
+                 if hasattr(self, name)}
+        state['_library'] = None
+        return None, state
     
     def __repr__(self) -> str:
         return f"'{self.title}' - {self.author} ({self.year})"
@@ -40,9 +62,13 @@ class LibraryBook(Book):
     """
     Физическая книга, которая хранится в библиотеке.
     """
+    __slots__ = ('inventory_number', 'shelf_location',
+                 'is_borrowed', 'current_borrower')
+    
     def __init__(self, title: str, author: str, year: int, genre: str, isbn: str,
-                 inventory_number: str, shelf_location: str):
-        super().__init__(title, author, year, genre, isbn)
+                 inventory_number: str, shelf_location: str,
+                 date_added: Optional[date] = None):
+        super().__init__(title, author, year, genre, isbn, date_added)
         self.inventory_number = inventory_number
         self.shelf_location = shelf_location
         self.is_borrowed = False
@@ -54,33 +80,45 @@ class LibraryBook(Book):
     
     def borrow(self, borrower_name: str) -> str:
         """Выдать книгу читателю"""
-
+        if self._library is not None:
+            return self._library._borrow_book(self, borrower_name)[1]
+        return self._borrow(borrower_name)[1]
+    
+    def return_book(self) -> str:
+        """Вернуть книгу в библиотеку"""
+        if self._library is not None:
+            return self._library._return_book(self)[1]
+        return self._return()[1]
+    
+    def _borrow(self, borrower_name: str) -> Tuple[bool, str]:
+        """Проверка и выдача; (выдана ли, сообщение)"""
         if self.is_borrowed:
-            return f"Книга '{self.title}' уже выдана {self.current_borrower}"
+            return False, f"Книга '{self.title}' уже выдана {self.current_borrower}"
         
         self.is_borrowed = True
         self.is_available = False
         self.current_borrower = borrower_name
-        
-        return f"Книга '{self.title}' выдана {borrower_name}"
+        return True, f"Книга '{self.title}' выдана {borrower_name}"
     
-    def return_book(self) -> str:
-        """Вернуть книгу в библиотеку"""
+    def _return(self) -> Tuple[bool, str]:
+        """Проверка и возврат; (возвращена ли, сообщение)"""
         if not self.is_borrowed:
-            return f"Книга '{self.title}' не была выдана"
+            return False, f"Книга '{self.title}' не была выдана"
         
         borrower = self.current_borrower
         self.is_borrowed = False
         self.is_available = True
         self.current_borrower = None
-        
-        return f"Книга '{self.title}' возвращена от {borrower}"
+        return True, f"Книга '{self.title}' возвращена от {borrower}"
 
 
 class EBook(Book):
+    __slots__ = ('file_size_mb', 'format_type', 'download_count')
+    
     def __init__(self, title: str, author: str, year: int, genre: str, isbn: str,
-                 file_size_mb: float, format_type: str):
-        super().__init__(title, author, year, genre, isbn)
+                 file_size_mb: float, format_type: str,
+                 date_added: Optional[date] = None):
+        super().__init__(title, author, year, genre, isbn, date_added)
         self.file_size_mb = file_size_mb
         self.format_type = format_type
         self.download_count = 0
@@ -92,6 +130,8 @@ class EBook(Book):
     def download(self, user_id: str) -> str:
         """Скачать книгу"""
         self.download_count += 1
+        if self._library is not None:
+            self._library._book_downloaded(self)
         
         estimated_time = self.file_size_mb / 10
         return (f"Книга '{self.title}' скачивается пользователем {user_id}. "
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional
+
+
+class Generations:
+    """
+    Счётчики поколений по областям индекса, например ('genre', 'Роман')
+    или ('trigram', 'вой'). Запись в область увеличивает её счётчик, и
+    все закэшированные по ней результаты становятся устаревшими;
+    остальные области не затрагиваются. Результат, зависящий от
+    нескольких областей, хранит сумму их счётчиков: счётчики только
+    растут, поэтому сумма меняется при записи в любую из них.
+    """
+    def __init__(self):
+        self._counters: Dict[Hashable, int] = {}
+    
+    def get(self, scope: Hashable) -> int:
+        return self._counters.get(scope, 0)
+    
+    def total(self, scopes: Iterable[Hashable]) -> int:
+        counters = self._counters
+        return sum(counters.get(scope, 0) for scope in scopes)
+    
+    def bump(self, scope: Hashable) -> None:
+        self._counters[scope] = self._counters.get(scope, 0) + 1
+    
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class QueryCache:
+    """
+    LRU-кэш результатов запросов ограниченного размера.
+    
+    Вместе с результатом хранится поколение его области; если с тех
+    пор в область писали, запись считается промахом и вычисляется
+    заново. Доступ под блокировкой, так как даже чтение переставляет
+    записи LRU.
+    """
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("maxsize должен быть не меньше 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, generation: int) -> Optional[list]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == generation:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.stale += 1
+            self.misses += 1
+            return None
+    
+    def put(self, key: Hashable, value: list, generation: int) -> None:
+        with self._lock:
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evictions': self.evictions,
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __repr__(self) -> str:
+        return f"QueryCache({len(self)}/{self.maxsize}, попаданий: {self.hits}, промахов: {self.misses})"
@@ -0,0 +1,318 @@
+import mmap
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Union
+
+from book import Book, LibraryBook, EBook
+
+
+MAGIC = b'LIBCAT1\0'
+
+# magic, число записей, число строк, затем смещения секций
+_HEADER = struct.Struct('<8sII12Q')
+# тип, доступность, год, строки (название, автор, жанр, ISBN, доп.1, доп.2,
+# читатель), размер файла, дата добавления (ordinal), число скачиваний
+_RECORD = struct.Struct('<BBhIIIIIIIdII')
+_NO_STRING = 0xFFFFFFFF
+
+_SECTIONS = ('string_offsets', 'string_heap', 'records', 'isbn_order',
+             'author_keys', 'author_starts', 'author_postings',
+             'year_keys', 'year_starts', 'year_postings',
+             'author_count', 'year_count')
+
+
+def _align(data: bytearray) -> None:
+    data.extend(b'\0' * (-len(data) % 8))
+
+
+def write_catalog(path: str, books: Iterable[Book]) -> int:
+    """
+    Записывает каталог в файл для MappedCatalog.
+    
+    Формат: заголовок, таблица строк (смещения + UTF-8), записи
+    фиксированной длины и три индекса - ISBN (номера записей,
+    отсортированные по ISBN), автор и год (ключи, начала групп,
+    номера записей). Массивы пишутся в little-endian.
+    """
+    if sys.byteorder != 'little':
+        raise RuntimeError("Формат каталога поддерживается только на little-endian")
+    
+    strings: dict[str, int] = {}
+    heap = bytearray()
+    offsets = array('Q', [0])
+    
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return _NO_STRING
+        string_id = strings.get(value)
+        if string_id is None:
+            string_id = strings[value] = len(offsets) - 1
+            heap.extend(value.encode('utf-8'))
+            offsets.append(len(heap))
+        return string_id
+    
+    records = bytearray()
+    isbns: List[bytes] = []
+    by_author: dict[str, List[int]] = {}
+    by_year: dict[int, List[int]] = {}
+    
+    for record_id, book in enumerate(books):
+        if isinstance(book, LibraryBook):
+            kind, extra1, extra2 = 1, book.inventory_number, book.shelf_location
+            borrower, file_size, downloads = book.current_borrower, 0.0, 0
+        elif isinstance(book, EBook):
+            kind, extra1, extra2 = 2, book.format_type, None
+            borrower, file_size, downloads = None, book.file_size_mb, book.download_count
+        else:
+            kind, extra1, extra2, borrower, file_size, downloads = 0, None, None, None, 0.0, 0
+        
+        records.extend(_RECORD.pack(
+            kind, 1 if book.is_available else 0, book.year,
+            intern(book.title), intern(book.author), intern(book.genre),
+            intern(book.isbn), intern(extra1), intern(extra2), intern(borrower),
+            file_size, book.date_added.toordinal(), downloads))
+        isbns.append(book.isbn.encode('utf-8'))
+        by_author.setdefault(book.author, []).append(record_id)
+        by_year.setdefault(book.year, []).append(record_id)
+    
+    isbn_order = array('I', sorted(range(len(isbns)), key=isbns.__getitem__))
+    
+    author_names = sorted(by_author, key=lambda name: name.encode('utf-8'))
+    author_keys = array('I', (strings[name] for name in author_names))
+    author_starts, author_postings = array('I', [0]), array('I')
+    for name in author_names:
+        author_postings.extend(by_author[name])
+        author_starts.append(len(author_postings))
+    
+    years = sorted(by_year)
+    year_keys = array('i', years)
+    year_starts, year_postings = array('I', [0]), array('I')
+    for year in years:
+        year_postings.extend(by_year[year])
+        year_starts.append(len(year_postings))
+    
+    body = bytearray()
+    section_offsets = []
+    for section in (offsets, heap, records, isbn_order,
+                    author_keys, author_starts, author_postings,
+                    year_keys, year_starts, year_postings):
+        section_offsets.append(_HEADER.size + len(body))
+        body.extend(section.tobytes() if isinstance(section, array) else section)
+        _align(body)
+    
+    header = _HEADER.pack(MAGIC, len(isbns), len(offsets) - 1, *section_offsets,
+                          len(author_names), len(years))
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    
+    return len(isbns)
+
+
+class LazyBookList:
+    """Результат запроса: книги создаются только при обращении"""
+    def __init__(self, catalog: 'MappedCatalog', record_ids):
+        self._catalog = catalog
+        self._record_ids = record_ids
+    
+    def __len__(self) -> int:
+        return len(self._record_ids)
+    
+    def __getitem__(self, key: Union[int, slice]) -> Union[Book, 'LazyBookList']:
+        if isinstance(key, slice):
+            return LazyBookList(self._catalog, self._record_ids[key])
+        return self._catalog._materialize(self._record_ids[key])
+    
+    def __iter__(self) -> Iterator[Book]:
+        materialize = self._catalog._materialize
+        for record_id in self._record_ids:
+            yield materialize(record_id)
+    
+    def __repr__(self) -> str:
+        return f"LazyBookList(книг: {len(self)})"
+
+
+class MappedCatalog:
+    """
+    Каталог только для чтения, открытый через mmap.
+    
+    При открытии читается лишь заголовок, секции становятся
+    memoryview поверх отображённого файла, поэтому открытие не
+    зависит от размера каталога. Поиск по ISBN - бинарный поиск по
+    отсортированной таблице, по автору и году - группы в индексах.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._closed = False
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # пустой файл не отображается
+            self._file.close()
+            raise ValueError(f"Файл '{path}' не является каталогом библиотеки") from None
+        
+        if len(self._mmap) < _HEADER.size or self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Файл '{path}' не является каталогом библиотеки")
+        magic, self._count, string_count, *rest = _HEADER.unpack_from(self._mmap, 0)
+        
+        layout = dict(zip(_SECTIONS, rest))
+        author_count, year_count = layout['author_count'], layout['year_count']
+        view = memoryview(self._mmap)
+        self._view = view
+        
+        def section(name: str, fmt: str, length: int) -> memoryview:
+            start = layout[name]
+            return view[start:start + length * struct.calcsize(fmt)].cast(fmt)
+        
+        self._string_offsets = section('string_offsets', 'Q', string_count + 1)
+        self._heap_start = layout['string_heap']
+        self._records_start = layout['records']
+        self._isbn_order = section('isbn_order', 'I', self._count)
+        self._author_keys = section('author_keys', 'I', author_count)
+        self._author_starts = section('author_starts', 'I', author_count + 1)
+        self._author_postings = section('author_postings', 'I', self._count)
+        self._year_keys = section('year_keys', 'i', year_count)
+        self._year_starts = section('year_starts', 'I', year_count + 1)
+        self._year_postings = section('year_postings', 'I', self._count)
+    
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError(f"Каталог '{self.path}' закрыт")
+    
+    def _string_bytes(self, string_id: int) -> bytes:
+        start = self._heap_start + self._string_offsets[string_id]
+        end = self._heap_start + self._string_offsets[string_id + 1]
+        return self._mmap[start:end]
+    
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id == _NO_STRING:
+            return None
+        return self._string_bytes(string_id).decode('utf-8')
+    
+    def _record_field(self, record_id: int, index: int) -> int:
+        return _RECORD.unpack_from(self._mmap, self._records_start + record_id * _RECORD.size)[index]
+    
+    def _materialize(self, record_id: int) -> Book:
+        self._check_open()
+        (kind, available, year, title, author, genre, isbn, extra1, extra2,
+         borrower, file_size, ordinal, downloads) = _RECORD.unpack_from(
+            self._mmap, self._records_start + record_id * _RECORD.size)
+        string = self._string
+        args = (string(title), string(author), year, string(genre), string(isbn))
+        date_added = date.fromordinal(ordinal)
+        
+        if kind == 1:
+            book = LibraryBook(*args, string(extra1), string(extra2), date_added=date_added)
+            book.is_borrowed = not available
+            book.current_borrower = string(borrower)
+        elif kind == 2:
+            book = EBook(*args, file_size, string(extra1), date_added=date_added)
+            book.download_count = downloads
+        else:
+            book = Book(*args, date_added=date_added)
+        
+        book.is_available = bool(available)
+        return book
+    
+    def _find_isbn(self, isbn: str) -> Optional[int]:
+        self._check_open()
+        key = isbn.encode('utf-8')
+        order = self._isbn_order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            record_id = order[middle]
+            if self._string_bytes(self._record_field(record_id, 6)) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order):
+            record_id = order[low]
+            if self._string_bytes(self._record_field(record_id, 6)) == key:
+                return record_id
+        return None
+    
+    def _group(self, starts: memoryview, postings: memoryview, position: int) -> memoryview:
+        return postings[starts[position]:starts[position + 1]]
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __contains__(self, isbn: str) -> bool:
+        return self._find_isbn(isbn) is not None
+    
+    def __iter__(self) -> Iterator[Book]:
+        self._check_open()
+        return iter(LazyBookList(self, range(self._count)))
+    
+    def __repr__(self) -> str:
+        return f"MappedCatalog('{self.path}', книг: {len(self)})"
+    
+    def search_by_isbn(self, isbn: str) -> Optional[Book]:
+        record_id = self._find_isbn(isbn)
+        return self._materialize(record_id) if record_id is not None else None
+    
+    def search_by_author(self, author: str) -> LazyBookList:
+        self._check_open()
+        key = author.encode('utf-8')
+        keys = self._author_keys
+        low, high = 0, len(keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(keys[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(keys) and self._string_bytes(keys[low]) == key:
+            return LazyBookList(self, self._group(self._author_starts, self._author_postings, low))
+        return LazyBookList(self, [])
+    
+    def search_by_year(self, year: int) -> LazyBookList:
+        self._check_open()
+        position = bisect_left(self._year_keys, year)
+        if position < len(self._year_keys) and self._year_keys[position] == year:
+            return LazyBookList(self, self._group(self._year_starts, self._year_postings, position))
+        return LazyBookList(self, [])
+    
+    def search_by_year_range(self, start: int, end: int) -> LazyBookList:
+        self._check_open()
+        low = bisect_left(self._year_keys, start)
+        high = bisect_right(self._year_keys, end)
+        if low >= high:
+            return LazyBookList(self, [])
+        return LazyBookList(self, self._year_postings[self._year_starts[low]:self._year_starts[high]])
+    
+    def get_random_book(self) -> Optional[Book]:
+        self._check_open()
+        if not self._count:
+            return None
+        return self._materialize(random.randrange(self._count))
+    
+    def close(self) -> None:
+        """Закрыть файл; после этого поиск и чтение ранее полученных LazyBookList дают ValueError"""
+        self._closed = True
+        for name in ('_string_offsets', '_isbn_order', '_author_keys', '_author_starts',
+                     '_author_postings', '_year_keys', '_year_starts', '_year_postings',
+                     '_view'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # результаты запросов ещё держат срезы отображения;
+            # файл закроется, когда их соберёт сборщик мусора
+            pass
+        self._file.close()
+    
+    def __enter__(self) -> 'MappedCatalog':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,277 @@
+from array import array
+from datetime import date
+from typing import Iterable, List, Optional
+
+from book import Book, LibraryBook, EBook
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_BOOK_TYPES = (Book, LibraryBook, EBook)
+
+
+class _Dictionary:
+    """Словарное кодирование строк: значение <-> целочисленный код"""
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: dict[str, int] = {}
+    
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class ColumnarCatalog:
+    """
+    Колоночное хранилище каталога для аналитики.
+    
+    Год и доступность лежат в типизированных массивах, автор, жанр
+    и тип книги - в словарно-закодированных целочисленных колонках.
+    Фильтры строятся как маски по колонкам: через NumPy, если он
+    установлен, иначе обычным проходом по массивам. Объекты книг
+    создаются только для строк результата.
+    
+    Удалённые строки помечаются в колонке `_alive`; когда их
+    становится больше, чем живых, колонки сжимаются. Library с
+    enable_columnar() обновляет каталог при добавлении, удалении,
+    выдаче, возврате и скачивании.
+    """
+    _COMPACT_MIN = 1024
+    
+    def __init__(self):
+        self._years = array('h')
+        self._available = bytearray()
+        self._alive = bytearray()
+        self._type_codes = bytearray()
+        self._author_codes = array('I')
+        self._genre_codes = array('I')
+        self._date_ordinals = array('I')
+        
+        self._titles: List[str] = []
+        self._isbns: List[str] = []
+        self._extras: List[tuple] = []
+        
+        self._authors = _Dictionary()
+        self._genres = _Dictionary()
+        self._rows: dict[str, int] = {}
+    
+    @classmethod
+    def from_books(cls, books: Iterable[Book]) -> 'ColumnarCatalog':
+        catalog = cls()
+        for book in books:
+            catalog.append(book)
+        return catalog
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __contains__(self, isbn: str) -> bool:
+        return isbn in self._rows
+    
+    def __repr__(self) -> str:
+        return (f"ColumnarCatalog(книг: {len(self)}, "
+                f"авторов: {len(self._authors.values)}, "
+                f"жанров: {len(self._genres.values)})")
+    
+    def extend(self, books: Iterable[Book]) -> int:
+        added = 0
+        for book in books:
+            added += self.append(book)
+        return added
+    
+    def append(self, book: Book) -> bool:
+        if book.isbn in self._rows:
+            return False
+        
+        if isinstance(book, LibraryBook):
+            type_code = 1
+            extras = (book.inventory_number, book.shelf_location,
+                      book.current_borrower)
+        elif isinstance(book, EBook):
+            type_code = 2
+            extras = (book.file_size_mb, book.format_type, book.download_count)
+        else:
+            type_code = 0
+            extras = ()
+        
+        self._rows[book.isbn] = len(self._isbns)
+        self._years.append(book.year)
+        self._available.append(1 if book.is_available else 0)
+        self._alive.append(1)
+        self._type_codes.append(type_code)
+        self._author_codes.append(self._authors.encode(book.author))
+        self._genre_codes.append(self._genres.encode(book.genre))
+        self._date_ordinals.append(book.date_added.toordinal())
+        self._titles.append(book.title)
+        self._isbns.append(book.isbn)
+        self._extras.append(extras)
+        return True
+    
+    def remove(self, isbn: str) -> bool:
+        row = self._rows.pop(isbn, None)
+        if row is None:
+            return False
+        self._alive[row] = 0
+        if len(self._isbns) - len(self._rows) > max(self._COMPACT_MIN, len(self._rows)):
+            self._compact()
+        return True
+    
+    def _compact(self) -> None:
+        """Убрать удалённые строки из всех колонок"""
+        alive = self._alive
+        keep = [row for row in range(len(alive)) if alive[row]]
+        for name in ('_years', '_author_codes', '_genre_codes', '_date_ordinals'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[row] for row in keep]))
+        for name in ('_available', '_type_codes'):
+            column = getattr(self, name)
+            setattr(self, name, bytearray(column[row] for row in keep))
+        for name in ('_titles', '_isbns', '_extras'):
+            column = getattr(self, name)
+            setattr(self, name, [column[row] for row in keep])
+        self._alive = bytearray(b'\x01') * len(keep)
+        self._rows = {isbn: row for row, isbn in enumerate(self._isbns)}
+    
+    def set_available(self, isbn: str, available: bool,
+                      borrower: Optional[str] = None) -> bool:
+        row = self._rows.get(isbn)
+        if row is None:
+            return False
+        self._available[row] = 1 if available else 0
+        if self._type_codes[row] == 1:
+            inventory_number, shelf_location, _ = self._extras[row]
+            self._extras[row] = (inventory_number, shelf_location,
+                                 None if available else borrower)
+        return True
+    
+    def set_download_count(self, isbn: str, download_count: int) -> bool:
+        row = self._rows.get(isbn)
+        if row is None or self._type_codes[row] != 2:
+            return False
+        file_size_mb, format_type, _ = self._extras[row]
+        self._extras[row] = (file_size_mb, format_type, download_count)
+        return True
+    
+    def _criteria(self, year_from: Optional[int], year_to: Optional[int],
+                  author: Optional[str], genre: Optional[str],
+                  book_type: Optional[type], available: Optional[bool]) -> Optional[list]:
+        """Пары (колонка, условие); None - результат заведомо пуст"""
+        criteria = []
+        
+        if author is not None:
+            code = self._authors.codes.get(author)
+            if code is None:
+                return None
+            criteria.append((self._author_codes, '==', code))
+        
+        if genre is not None:
+            code = self._genres.codes.get(genre)
+            if code is None:
+                return None
+            criteria.append((self._genre_codes, '==', code))
+        
+        if book_type is not None:
+            if book_type not in _BOOK_TYPES:
+                return None
+            criteria.append((self._type_codes, '==', _BOOK_TYPES.index(book_type)))
+        
+        if available is not None:
+            criteria.append((self._available, '==', 1 if available else 0))
+        
+        if year_from is not None:
+            criteria.append((self._years, '>=', year_from))
+        
+        if year_to is not None:
+            criteria.append((self._years, '<=', year_to))
+        
+        return criteria
+    
+    def _select_numpy(self, criteria: list) -> List[int]:
+        mask = np.frombuffer(self._alive, dtype=np.uint8) == 1
+        
+        for column, op, value in criteria:
+            values = np.frombuffer(column, dtype=getattr(column, 'typecode', 'B'))
+            if op == '==':
+                mask &= values == value
+            elif op == '>=':
+                mask &= values >= value
+            else:
+                mask &= values <= value
+        
+        return np.flatnonzero(mask).tolist()
+    
+    def _select_python(self, criteria: list) -> List[int]:
+        rows = [row for row, alive in enumerate(self._alive) if alive]
+        
+        for column, op, value in criteria:
+            if op == '==':
+                rows = [row for row in rows if column[row] == value]
+            elif op == '>=':
+                rows = [row for row in rows if column[row] >= value]
+            else:
+                rows = [row for row in rows if column[row] <= value]
+        
+        return rows
+    
+    def _select(self, **kwargs) -> List[int]:
+        criteria = self._criteria(**kwargs)
+        if criteria is None:
+            return []
+        if np is not None:
+            return self._select_numpy(criteria)
+        return self._select_python(criteria)
+    
+    def filter(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+               author: Optional[str] = None, genre: Optional[str] = None,
+               book_type: Optional[type] = None,
+               available: Optional[bool] = None) -> List[Book]:
+        rows = self._select(year_from=year_from, year_to=year_to, author=author,
+                            genre=genre, book_type=book_type, available=available)
+        return [self._materialize(row) for row in rows]
+    
+    def isbns(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+              author: Optional[str] = None, genre: Optional[str] = None,
+              book_type: Optional[type] = None,
+              available: Optional[bool] = None) -> List[str]:
+        """ISBN подходящих строк в порядке строк, без создания книг"""
+        rows = self._select(year_from=year_from, year_to=year_to, author=author,
+                            genre=genre, book_type=book_type, available=available)
+        isbns = self._isbns
+        return [isbns[row] for row in rows]
+    
+    def count(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+              author: Optional[str] = None, genre: Optional[str] = None,
+              book_type: Optional[type] = None,
+              available: Optional[bool] = None) -> int:
+        return len(self._select(year_from=year_from, year_to=year_to, author=author,
+                                genre=genre, book_type=book_type, available=available))
+    
+    def _materialize(self, row: int) -> Book:
+        args = (self._titles[row],
+                self._authors.values[self._author_codes[row]],
+                self._years[row],
+                self._genres.values[self._genre_codes[row]],
+                self._isbns[row])
+        date_added = date.fromordinal(self._date_ordinals[row])
+        type_code = self._type_codes[row]
+        extras = self._extras[row]
+        
+        if type_code == 1:
+            book = LibraryBook(*args, extras[0], extras[1], date_added=date_added)
+            book.is_borrowed = not self._available[row]
+            book.current_borrower = extras[2]
+        elif type_code == 2:
+            book = EBook(*args, extras[0], extras[1], date_added=date_added)
+            book.download_count = extras[2]
+        else:
+            book = Book(*args, date_added=date_added)
+        
+        book.is_available = bool(self._available[row])
+        return book
@@ -0,0 +1,203 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
+from book import Book, LibraryBook, EBook
+from columnar import ColumnarCatalog
+from library import Library
+from events import EventSink
+from journal import Journal
+from ledger import Loan
+from rwlock import RWLock
+from telemetry import QueryTelemetry
+from cache import QueryCache
+from query import QueryPlan
+
+
+class ConcurrentLibrary(Library):
+    """
+    Library для работы из нескольких потоков.
+    
+    Поиск, проверки и статистика идут под блокировкой чтения и
+    выполняются параллельно, изменения (добавление, удаление,
+    выдача/возврат вместе с проверкой, журнал) - под блокировкой
+    записи. Скачивания блокировку не берут: DownloadTracker считает их
+    по потокам сам (чтение берётся, только если включён колоночный
+    каталог). Счётчик операций увеличивается и под блокировкой
+    чтения, поэтому при параллельных поисках он приблизительный.
+    """
+    def __init__(self, name: str = "Главная библиотека",
+                 events: Optional[EventSink] = None,
+                 telemetry: Optional[QueryTelemetry] = None, cache_size: int = 0):
+        super().__init__(name, events, telemetry, cache_size)
+        self._lock = RWLock()
+    
+    def add_book(self, book: Book) -> bool:
+        with self._lock.write():
+            return super().add_book(book)
+    
+    def add_books(self, books: Iterable[Book]) -> dict:
+        books = list(books)
+        with self._lock.write():
+            return super().add_books(books)
+    
+    def remove_book(self, identifier: Union[Book, str]) -> bool:
+        with self._lock.write():
+            return super().remove_book(identifier)
+    
+    def _borrow_book(self, book: LibraryBook, borrower: str) -> Tuple[bool, str]:
+        with self._lock.write():
+            return super()._borrow_book(book, borrower)
+    
+    def _return_book(self, book: LibraryBook) -> Tuple[bool, str]:
+        with self._lock.write():
+            return super()._return_book(book)
+    
+    def _book_downloaded(self, book: EBook) -> None:
+        if self._columnar is None:
+            super()._book_downloaded(book)
+            return
+        # колоночный каталог может сжиматься под записью - строку ищем под чтением
+        with self._lock.read():
+            super()._book_downloaded(book)
+    
+    def attach_journal(self, journal: Optional[Journal]) -> None:
+        with self._lock.write():
+            super().attach_journal(journal)
+    
+    def replay_journal(self, journal: Journal) -> int:
+        with self._lock.write():
+            return super().replay_journal(journal)
+    
+    def compact_journal(self, snapshot_path: str) -> None:
+        with self._lock.write():
+            super().compact_journal(snapshot_path)
+    
+    def enable_cache(self, maxsize: int = 1024) -> QueryCache:
+        with self._lock.write():
+            return super().enable_cache(maxsize)
+    
+    def search_by_author(self, author: str) -> List[Book]:
+        with self._lock.read():
+            return super().search_by_author(author)
+    
+    def search_by_year(self, year: int) -> List[Book]:
+        with self._lock.read():
+            return super().search_by_year(year)
+    
+    def search_by_year_range(self, start: int, end: int) -> List[Book]:
+        with self._lock.read():
+            return super().search_by_year_range(start, end)
+    
+    def count_by_year_range(self, start: int, end: int) -> int:
+        with self._lock.read():
+            return super().count_by_year_range(start, end)
+    
+    def search_by_isbn(self, isbn: str) -> Optional[Book]:
+        with self._lock.read():
+            return super().search_by_isbn(isbn)
+    
+    def search_by_genre(self, genre: str) -> List[Book]:
+        with self._lock.read():
+            return super().search_by_genre(genre)
+    
+    def search_by_title(self, keyword: str) -> List[Book]:
+        with self._lock.read():
+            return super().search_by_title(keyword)
+    
+    def query(self, author: Optional[str] = None, year: Optional[int] = None,
+              genre: Optional[str] = None, title_contains: Optional[str] = None,
+              available: Optional[bool] = None) -> List[Book]:
+        with self._lock.read():
+            return super().query(author, year, genre, title_contains, available)
+    
+    def explain(self, author: Optional[str] = None, year: Optional[int] = None,
+                genre: Optional[str] = None, title_contains: Optional[str] = None,
+                available: Optional[bool] = None) -> QueryPlan:
+        with self._lock.read():
+            return super().explain(author, year, genre, title_contains, available)
+    
+    def available_by_author(self, author: str) -> List[Book]:
+        with self._lock.read():
+            return super().available_by_author(author)
+    
+    def available_by_genre(self, genre: str) -> List[Book]:
+        with self._lock.read():
+            return super().available_by_genre(genre)
+    
+    def available_by_year(self, year: int) -> List[Book]:
+        with self._lock.read():
+            return super().available_by_year(year)
+    
+    def available_by_year_range(self, start: int, end: int) -> List[Book]:
+        with self._lock.read():
+            return super().available_by_year_range(start, end)
+    
+    def count_available(self) -> int:
+        with self._lock.read():
+            return super().count_available()
+    
+    def top_downloaded(self, n: int = 10) -> List[EBook]:
+        with self._lock.read():
+            return super().top_downloaded(n)
+    
+    def books_borrowed_by(self, borrower: str) -> List[LibraryBook]:
+        with self._lock.read():
+            return super().books_borrowed_by(borrower)
+    
+    def get_loan(self, isbn: str) -> Optional[Loan]:
+        with self._lock.read():
+            return super().get_loan(isbn)
+    
+    def count_on_loan(self) -> int:
+        with self._lock.read():
+            return super().count_on_loan()
+    
+    def get_all_books(self) -> List[Book]:
+        """Копия списка книг: по самой коллекции нельзя итерироваться без блокировки"""
+        with self._lock.read():
+            return list(super().get_all_books())
+    
+    def get_random_book(self) -> Optional[Book]:
+        with self._lock.read():
+            return super().get_random_book()
+    
+    def get_stats(self) -> dict:
+        with self._lock.read():
+            return super().get_stats()
+    
+    def to_columnar(self) -> ColumnarCatalog:
+        with self._lock.read():
+            return super().to_columnar()
+    
+    def enable_columnar(self) -> ColumnarCatalog:
+        with self._lock.write():
+            return super().enable_columnar()
+    
+    def filter_books(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                     author: Optional[str] = None, genre: Optional[str] = None,
+                     book_type: Optional[type] = None,
+                     available: Optional[bool] = None) -> List[Book]:
+        with self._lock.read():
+            return super().filter_books(year_from, year_to, author, genre, book_type, available)
+    
+    def count_books(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                    author: Optional[str] = None, genre: Optional[str] = None,
+                    book_type: Optional[type] = None,
+                    available: Optional[bool] = None) -> int:
+        with self._lock.read():
+            return super().count_books(year_from, year_to, author, genre, book_type, available)
+    
+    def save_catalog(self, path: str) -> int:
+        with self._lock.read():
+            return super().save_catalog(path)
+    
+    def save_snapshot(self, path: str) -> None:
+        with self._lock.read():
+            super().save_snapshot(path)
+    
+    def __len__(self) -> int:
+        with self._lock.read():
+            return super().__len__()
+    
+    def __contains__(self, item: Union[Book, str]) -> bool:
+        with self._lock.read():
+            return super().__contains__(item)
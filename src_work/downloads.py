@@ -0,0 +1,184 @@
+import heapq
+import threading
+import weakref
+from typing import Dict, Iterable, List, Tuple
+
+from book import Book, EBook
+
+
+class _Shard:
+    """Счётчики одного потока; блокировка берётся без конкуренции, кроме слияния"""
+    __slots__ = ('counts', 'lock', 'pending')
+    
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.pending = 0
+
+
+class _ShardOwner:
+    """Живёт в локальных данных потока, пока жив поток; по нему отслеживается завершение"""
+    __slots__ = ('__weakref__',)
+
+
+def _retire_shard(tracker_ref: 'weakref.ref[DownloadTracker]', shard: _Shard) -> None:
+    tracker = tracker_ref()
+    if tracker is not None:
+        tracker._retire_shard(shard)
+
+
+class DownloadTracker:
+    """
+    Учёт скачиваний электронных книг.
+    
+    Каждый поток считает скачивания в своём шарде и раз в merge_every
+    скачиваний сливает его в общие итоги, так что потоки не спорят
+    за одну блокировку на каждое скачивание. Вместе с итогами ведётся
+    топ-N: словарь участников и min-куча с ленивым удалением
+    устаревших записей. Счётчики только растут, поэтому книга вне
+    топа попадает в него, только обогнав минимум, и запрос топа стоит
+    O(N log N), а не сортировки всего каталога. Когда поток
+    завершается, его шард сливается в итоги и удаляется, поэтому
+    число шардов ограничено числом живых потоков.
+    """
+    def __init__(self, top_n: int = 100, merge_every: int = 256):
+        if top_n < 1:
+            raise ValueError("top_n должен быть не меньше 1")
+        self.top_n = top_n
+        self.merge_every = merge_every
+        self._totals: Dict[str, int] = {}
+        self._total = 0
+        self._top: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._top_complete = True
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+    
+    def _new_shard(self) -> _Shard:
+        shard = _Shard()
+        with self._lock:
+            self._shards.append(shard)
+        local = self._local
+        local.shard = shard
+        # локальные данные удаляются вместе с потоком, и тогда шард сливается в итоги
+        local.owner = _ShardOwner()
+        weakref.finalize(local.owner, _retire_shard, weakref.ref(self), shard)
+        return shard
+    
+    def _retire_shard(self, shard: _Shard) -> None:
+        self._merge_shard(shard)
+        with self._lock:
+            try:
+                self._shards.remove(shard)
+            except ValueError:
+                pass
+    
+    def record(self, isbn: str, count: int = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        with shard.lock:
+            counts = shard.counts
+            counts[isbn] = counts.get(isbn, 0) + count
+            shard.pending += 1
+            if shard.pending < self.merge_every:
+                return
+        self._merge_shard(shard)
+    
+    def _merge_shard(self, shard: _Shard) -> None:
+        with shard.lock:
+            counts, shard.counts = shard.counts, {}
+            shard.pending = 0
+        if not counts:
+            return
+        with self._lock:
+            totals = self._totals
+            for isbn, count in counts.items():
+                total = totals[isbn] = totals.get(isbn, 0) + count
+                self._total += count
+                self._offer(isbn, total)
+    
+    def merge(self) -> None:
+        """Слить шарды всех потоков в общие итоги"""
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            self._merge_shard(shard)
+    
+    def _offer(self, isbn: str, total: int) -> None:
+        """Обновить топ после роста счётчика (под self._lock)"""
+        top, heap = self._top, self._heap
+        if isbn in top or len(top) < self.top_n:
+            top[isbn] = total
+            heapq.heappush(heap, (total, isbn))
+        else:
+            self._drop_stale()
+            if total <= heap[0][0]:
+                return
+            _, smallest = heapq.heapreplace(heap, (total, isbn))
+            del top[smallest]
+            top[isbn] = total
+        if len(heap) > 4 * self.top_n:
+            self._heap = [(count, key) for key, count in top.items()]
+            heapq.heapify(self._heap)
+    
+    def _drop_stale(self) -> None:
+        heap, top = self._heap, self._top
+        while heap and top.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+    
+    def add_books(self, books: Iterable[Book]) -> None:
+        """Учесть скачивания, накопленные книгами до добавления в библиотеку"""
+        with self._lock:
+            for book in books:
+                if isinstance(book, EBook) and book.download_count:
+                    self._total += book.download_count - self._totals.get(book.isbn, 0)
+                    total = self._totals[book.isbn] = book.download_count
+                    self._offer(book.isbn, total)
+    
+    def remove_book(self, book: Book) -> None:
+        self.merge()
+        with self._lock:
+            self._total -= self._totals.pop(book.isbn, 0)
+            if self._top.pop(book.isbn, None) is not None:
+                # место в топе освободилось, заполнить его можно только по всем итогам
+                self._top_complete = False
+    
+    def count(self, isbn: str) -> int:
+        self.merge()
+        return self._totals.get(isbn, 0)
+    
+    @property
+    def total(self) -> int:
+        self.merge()
+        return self._total
+    
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """До n самых скачиваемых (ISBN, число скачиваний), n <= top_n"""
+        self.merge()
+        with self._lock:
+            if not self._top_complete:
+                self._top = dict(heapq.nlargest(self.top_n, self._totals.items(),
+                                                key=lambda item: item[1]))
+                self._heap = [(count, key) for key, count in self._top.items()]
+                heapq.heapify(self._heap)
+                self._top_complete = True
+            ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:min(n, self.top_n)]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+            self._total = 0
+            self._top.clear()
+            self._heap.clear()
+            self._top_complete = True
+            for shard in self._shards:
+                with shard.lock:
+                    shard.counts.clear()
+                    shard.pending = 0
+    
+    def __repr__(self) -> str:
+        return f"DownloadTracker(книг: {len(self._totals)}, топ: {len(self._top)})"
@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+
+class EventSink:
+    """
+    Базовый приёмник событий библиотеки.
+    
+    Событие - уровень, имя, шаблон сообщения и поля. Шаблон
+    форматируется через str.format только тем приёмником, которому
+    нужен текст, и только если уровень события не ниже порога.
+    """
+    def __init__(self, level: int = INFO):
+        self.level = level
+    
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+    
+    def emit(self, level: int, event: str, template: str, **fields) -> None:
+        if level >= self.level:
+            self._write(level, event, template, fields)
+    
+    def _write(self, level: int, event: str, template: str, fields: dict) -> None:
+        raise NotImplementedError
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.flush()
+    
+    def __enter__(self) -> 'EventSink':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class NullSink(EventSink):
+    """Ничего не делает и ничего не форматирует"""
+    def __init__(self):
+        super().__init__(level=ERROR + 1)
+    
+    def enabled(self, level: int) -> bool:
+        return False
+    
+    def emit(self, level: int, event: str, template: str, **fields) -> None:
+        pass
+
+
+class ConsoleSink(EventSink):
+    """Печатает сообщения в консоль, как раньше делал print()"""
+    def _write(self, level: int, event: str, template: str, fields: dict) -> None:
+        print(template.format(**fields))
+
+
+class MemorySink(EventSink):
+    """
+    Хранит события в памяти (не больше maxlen последних),
+    текст собирается только при чтении messages.
+    """
+    def __init__(self, level: int = INFO, maxlen: Optional[int] = None):
+        super().__init__(level)
+        self._events: deque = deque(maxlen=maxlen)
+    
+    def _write(self, level: int, event: str, template: str, fields: dict) -> None:
+        self._events.append((level, event, template, fields))
+    
+    @property
+    def messages(self) -> List[str]:
+        return [template.format(**fields) for _, _, template, fields in self._events]
+    
+    def clear(self) -> None:
+        self._events.clear()
+    
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class RecordSink(EventSink):
+    """Структурированные записи: время, уровень, имя события и поля"""
+    def __init__(self, level: int = INFO, maxlen: Optional[int] = None):
+        super().__init__(level)
+        self._records: deque = deque(maxlen=maxlen)
+    
+    def _write(self, level: int, event: str, template: str, fields: dict) -> None:
+        self._records.append({
+            'time': time.time(),
+            'level': LEVEL_NAMES.get(level, str(level)),
+            'event': event,
+            **fields,
+        })
+    
+    @property
+    def records(self) -> List[dict]:
+        return list(self._records)
+    
+    def clear(self) -> None:
+        self._records.clear()
+    
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class BufferedFileSink(EventSink):
+    """Пишет сообщения в файл пачками по buffer_size строк"""
+    def __init__(self, path: str, level: int = INFO, buffer_size: int = 1000):
+        super().__init__(level)
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer: list = []
+        self._file = open(path, 'a', encoding='utf-8')
+    
+    def _write(self, level: int, event: str, template: str, fields: dict) -> None:
+        self._buffer.append((level, template, fields))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self) -> None:
+        if not self._buffer or self._file.closed:
+            return
+        lines = [f"{LEVEL_NAMES.get(level, level)} {template.format(**fields)}\n"
+                 for level, template, fields in self._buffer]
+        self._buffer.clear()
+        self._file.writelines(lines)
+        self._file.flush()
+    
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class BackgroundFileWriter:
+    """
+    Фоновая запись в файл: записи кладутся в очередь без блокировки,
+    поток-писатель форматирует их через formatter и пишет пачками
+    до batch_size строк.
+    """
+    _STOP = object()
+    
+    def __init__(self, path: str, formatter: Callable[[object], str],
+                 batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        self._formatter = formatter
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+    
+    def submit(self, record: object) -> None:
+        self._queue.put(record)
+    
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if batch[-1] is self._STOP:
+                batch.pop()
+                stopping = True
+            
+            if batch:
+                self._file.writelines(f"{self._formatter(record)}\n" for record in batch)
+                self._file.flush()
+        
+        self._file.close()
+    
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
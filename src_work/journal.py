@@ -0,0 +1,230 @@
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from datetime import date
+from typing import Iterator, Optional, Tuple
+
+from book import Book, LibraryBook, EBook
+
+
+# длина тела и его crc32; по crc отсекается недописанный хвост
+_HEADER = struct.Struct('<II')
+
+
+def book_to_record(book: Book) -> tuple:
+    """Книга как кортеж простых значений, без ссылки на библиотеку"""
+    fields = (book.title, book.author, book.year, book.genre, book.isbn,
+              book.date_added.toordinal(), book.is_available)
+    if isinstance(book, LibraryBook):
+        return (1, fields, (book.inventory_number, book.shelf_location,
+                            book.is_borrowed, book.current_borrower))
+    if isinstance(book, EBook):
+        return (2, fields, (book.file_size_mb, book.format_type, book.download_count))
+    return (0, fields, None)
+
+
+def book_from_record(record: tuple) -> Book:
+    kind, (title, author, year, genre, isbn, ordinal, available), extra = record
+    args = (title, author, year, genre, isbn)
+    date_added = date.fromordinal(ordinal)
+    
+    if kind == 1:
+        book = LibraryBook(*args, extra[0], extra[1], date_added=date_added)
+        book.is_borrowed = extra[2]
+        book.current_borrower = extra[3]
+    elif kind == 2:
+        book = EBook(*args, extra[0], extra[1], date_added=date_added)
+        book.download_count = extra[2]
+    else:
+        book = Book(*args, date_added=date_added)
+    
+    book.is_available = available
+    return book
+
+
+def fsync_path(path: str) -> None:
+    """fsync файла или каталога по пути"""
+    flags = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) if os.path.isdir(path) else os.O_RDONLY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    Журнал изменений библиотеки, только дозапись.
+    
+    Запись - (номер, операция, аргументы). Записи копятся в списке и
+    сбрасываются на диск одним кадром - pickle всей группы с префиксом
+    длины и crc32 - через один write + fsync (групповой коммит), когда
+    набралось group_size записей или первая запись группы ждёт
+    group_interval секунд. Срок соблюдает фоновый поток, поэтому
+    неполная группа не остаётся в памяти и после затишья; при сбое
+    теряются записи не старше group_interval. group_size=1 - fsync на
+    каждую операцию, fsync=False - только запись в ОС. close()
+    сбрасывает остаток и останавливает поток. last_seq - наибольший
+    номер записи, считая и записи файла на момент открытия.
+    """
+    def __init__(self, path: str, group_size: int = 64,
+                 group_interval: float = 0.05, fsync: bool = True):
+        if group_size < 1:
+            raise ValueError("group_size должен быть не меньше 1")
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.fsync = fsync
+        self.appended = 0
+        self.syncs = 0
+        self._pending: list = []
+        self._deadline = 0.0
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_idle = False
+        self._last_seq = 0
+        # защищает _pending и файл: сброс по сроку идёт из потока _flush_loop
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        
+        self._file = open(path, 'ab+')
+        # недописанная при сбое запись обрезается, иначе новые записи окажутся за ней
+        valid_end = self._scan_end()
+        if valid_end != self._file.seek(0, os.SEEK_END):
+            self._file.truncate(valid_end)
+    
+    def _read(self) -> Iterator[Tuple[int, bytes]]:
+        """Целые кадры файла: (смещение конца кадра, тело)"""
+        self._file.seek(0)
+        offset = 0
+        while True:
+            header = self._file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, checksum = _HEADER.unpack(header)
+            body = self._file.read(length)
+            if len(body) < length or zlib.crc32(body) != checksum:
+                return
+            offset += _HEADER.size + length
+            yield offset, body
+    
+    def _scan_end(self) -> int:
+        """Конец последнего целого кадра; заодно номер его последней записи"""
+        end, last_body = 0, None
+        for end, last_body in self._read():
+            pass
+        if last_body is not None:
+            self._last_seq = pickle.loads(last_body)[-1][0]
+        return end
+    
+    @property
+    def last_seq(self) -> int:
+        """Номер последней записи журнала (0 - записей не было)"""
+        return self._last_seq
+    
+    def records(self) -> Iterator[tuple]:
+        """Записи журнала по порядку: (номер, операция, аргументы)"""
+        with self._lock:
+            self._sync_locked()
+            bodies = [body for _, body in self._read()]
+            self._file.seek(0, os.SEEK_END)
+        for body in bodies:
+            yield from pickle.loads(body)
+    
+    def append(self, seq: int, op: str, args: tuple) -> None:
+        with self._lock:
+            if self._closed:
+                raise ValueError("Журнал закрыт")
+            pending = self._pending
+            pending.append((seq, op, args))
+            self.appended += 1
+            self._last_seq = max(self._last_seq, seq)
+            
+            if len(pending) == 1:
+                self._deadline = time.monotonic() + self.group_interval
+                if self.group_interval > 0 and len(pending) < self.group_size:
+                    if self._flusher is None:
+                        self._start_flusher()
+                    elif self._flusher_idle:
+                        self._cond.notify()
+                    return
+            if len(pending) >= self.group_size or time.monotonic() >= self._deadline:
+                self._sync_locked()
+    
+    def _start_flusher(self) -> None:
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True,
+                                         name=f"journal-flush:{self.path}")
+        self._flusher.start()
+    
+    def _flush_loop(self) -> None:
+        """
+        Сбрасывает группу, как только истёк срок её первой записи.
+        Пока записи идут, поток просыпается раз в group_interval и
+        будить его не нужно; после пустого интервала он засыпает до
+        следующей записи.
+        """
+        with self._cond:
+            while not self._closed:
+                if not self._pending:
+                    self._cond.wait(self.group_interval)
+                    if not self._pending and not self._closed:
+                        self._flusher_idle = True
+                        self._cond.wait()
+                        self._flusher_idle = False
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._sync_locked()
+    
+    def _sync_locked(self) -> None:
+        if self._pending:
+            body = pickle.dumps(self._pending, protocol=pickle.HIGHEST_PROTOCOL)
+            self._file.write(_HEADER.pack(len(body), zlib.crc32(body)) + body)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._pending.clear()
+            self.syncs += 1
+    
+    def sync(self) -> None:
+        """Сбросить накопленную группу на диск"""
+        with self._lock:
+            self._sync_locked()
+    
+    def truncate(self) -> None:
+        """Очистить журнал после того, как его записи вошли в снимок"""
+        with self._lock:
+            self._pending.clear()
+            self._file.truncate(0)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+    
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._sync_locked()
+            self._closed = True
+            self._cond.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self._file.close()
+    
+    def __enter__(self) -> 'Journal':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def __repr__(self) -> str:
+        return f"Journal('{self.path}', записей: {self.appended}, сбросов: {self.syncs})"
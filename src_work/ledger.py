@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from book import Book, LibraryBook
+
+
+@dataclass
+class Loan:
+    """Выдача книги: кому и когда (None - время неизвестно)"""
+    book: LibraryBook
+    borrower: str
+    since: Optional[datetime]
+
+
+class BorrowLedger:
+    """
+    Журнал выдач библиотеки.
+    
+    Хранит выдачу по ISBN и индекс читатель -> {ISBN: книга}, поэтому
+    «что на руках у читателя» стоит O(результата), а число выданных
+    книг и читателей - O(1). Обновляется хуками Library при выдаче и
+    возврате книг.
+    """
+    def __init__(self):
+        self._loans: Dict[str, Loan] = {}
+        self._by_borrower: Dict[str, Dict[str, LibraryBook]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._loans)
+    
+    def __contains__(self, isbn: str) -> bool:
+        return isbn in self._loans
+    
+    def __iter__(self) -> Iterator[Loan]:
+        return iter(self._loans.values())
+    
+    def __repr__(self) -> str:
+        return f"BorrowLedger(выдано: {len(self)}, читателей: {self.borrower_count})"
+    
+    @property
+    def borrower_count(self) -> int:
+        return len(self._by_borrower)
+    
+    def record_borrow(self, book: LibraryBook, borrower: str,
+                      since: Optional[datetime] = None) -> Loan:
+        self.record_return(book)
+        loan = Loan(book, borrower, since)
+        self._loans[book.isbn] = loan
+        self._by_borrower.setdefault(borrower, {})[book.isbn] = book
+        return loan
+    
+    def record_return(self, book: Book) -> Optional[Loan]:
+        loan = self._loans.pop(book.isbn, None)
+        if loan is None:
+            return None
+        held = self._by_borrower[loan.borrower]
+        del held[book.isbn]
+        if not held:
+            del self._by_borrower[loan.borrower]
+        return loan
+    
+    def add_books(self, books: Iterable[Book]) -> None:
+        """Учесть книги, которые уже выданы к моменту добавления в библиотеку"""
+        for book in books:
+            if isinstance(book, LibraryBook) and book.is_borrowed:
+                self.record_borrow(book, book.current_borrower)
+    
+    def get(self, isbn: str) -> Optional[Loan]:
+        return self._loans.get(isbn)
+    
+    def books_of(self, borrower: str) -> List[LibraryBook]:
+        return list(self._by_borrower.get(borrower, {}).values())
+    
+    def borrowers(self) -> List[str]:
+        return list(self._by_borrower)
+    
+    def clear(self) -> None:
+        self._loans.clear()
+        self._by_borrower.clear()
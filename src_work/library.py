@@ -1,28 +1,114 @@
-from typing import List, Optional, Union
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple, Union
 from book import Book, LibraryBook, EBook
-from Сollection import BookCollection, IndexDict
+from Сollection import BookCollection, IndexDict, TitleIndex
+from columnar import ColumnarCatalog
+from catalog import MappedCatalog, write_catalog
+from events import EventSink, ConsoleSink, INFO, WARNING, ERROR
+from journal import Journal, book_to_record, book_from_record, fsync_path
+from ledger import BorrowLedger, Loan
+from downloads import DownloadTracker
+from telemetry import QueryTelemetry
+from cache import QueryCache, Generations
+from query import QueryPlan, plan_query, execute_plan
 
 
 class Library:
-    def __init__(self, name: str = "Главная библиотека"):
+    # пачка больше этого числа книг сбрасывает весь кэш названий
+    _TITLE_BUMP_LIMIT = 256
+    
+    def __init__(self, name: str = "Главная библиотека",
+                 events: Optional[EventSink] = None,
+                 telemetry: Optional[QueryTelemetry] = None, cache_size: int = 0):
         self.name = name
+        self._events = events if events is not None else ConsoleSink()
+        self._telemetry = telemetry
+        self._cache: Optional[QueryCache] = QueryCache(cache_size) if cache_size else None
+        self._generations = Generations()
         self._books = BookCollection()
-        self._index = IndexDict()
+        self._index = IndexDict(self._events)
+        self._ledger = BorrowLedger()
+        self._downloads = DownloadTracker()
         self._total_operations = 0
+        self._journal: Optional[Journal] = None
+        self._journal_seq = 0
+        self._columnar: Optional[ColumnarCatalog] = None
     
     def add_book(self, book: Book) -> bool:
         self._total_operations += 1
         
         if book.isbn in self._index:
-            print(f"Книга с ISBN {book.isbn} уже существует")
+            self._events.emit(WARNING, 'duplicate_isbn',
+                              "Книга с ISBN {isbn} уже существует", isbn=book.isbn)
+            return False
+        
+        if book._library is not None and book._library is not self:
+            self._events.emit(WARNING, 'book_in_other_library',
+                              "Книга '{title}' уже добавлена в библиотеку '{library}'",
+                              title=book.title, library=book._library.name)
             return False
         
-        self._books.add_book(book)
+        if not self._books.add_book(book):
+            self._events.emit(ERROR, 'sync_error',
+                              "Ошибка синхронизации при добавлении книги '{title}'",
+                              title=book.title)
+            return False
         self._index.add_book(book)
+        self._invalidate((book,))
+        book._library = self
+        if self._columnar is not None:
+            self._columnar.append(book)
+        if isinstance(book, LibraryBook) and book.is_borrowed:
+            self._ledger.record_borrow(book, book.current_borrower)
+        elif isinstance(book, EBook) and book.download_count:
+            self._downloads.add_books((book,))
+        if self._journal is not None:
+            self._log('add', book_to_record(book))
         
-        print(f"Книга '{book.title}' добавлена в библиотеку '{self.name}'")
+        self._events.emit(INFO, 'book_added',
+                          "Книга '{title}' добавлена в библиотеку '{library}'",
+                          title=book.title, library=self.name)
         return True
     
+    def add_books(self, books: Iterable[Book]) -> dict:
+        """
+        Пакетная загрузка: дубликаты ISBN отсеиваются за один проход,
+        индексы строятся пачкой, вместо вывода на каждую книгу
+        возвращается сводка. Книги, уже добавленные в другую
+        библиотеку, пропускаются.
+        """
+        self._total_operations += 1
+        
+        books = list(books)
+        own_books = [book for book in books if book._library is None or book._library is self]
+        new_books = self._index.add_books(own_books)
+        self._books.add_books(new_books)
+        self._invalidate(new_books)
+        for book in new_books:
+            book._library = self
+        if self._columnar is not None:
+            self._columnar.extend(new_books)
+        self._ledger.add_books(new_books)
+        self._downloads.add_books(new_books)
+        if self._journal is not None and new_books:
+            self._log('add_many', [book_to_record(book) for book in new_books])
+        
+        self._events.emit(INFO, 'books_loaded',
+                          "В библиотеку '{library}' загружено {added} книг "
+                          "(дубликатов: {duplicates}, из других библиотек: {foreign})",
+                          library=self.name, added=len(new_books),
+                          duplicates=len(own_books) - len(new_books),
+                          foreign=len(books) - len(own_books))
+        
+        return {
+            'received': len(books),
+            'added': len(new_books),
+            'duplicates': len(own_books) - len(new_books),
+            'foreign': len(books) - len(own_books),
+            'total_books': len(self._books),
+        }
+    
     def remove_book(self, identifier: Union[Book, str]) -> bool:
         self._total_operations += 1
         
@@ -31,55 +117,401 @@ class Library:
         elif isinstance(identifier, str):
             book = self._index.get(identifier)
             if book is None:
-                print(f"Книга с ISBN '{identifier}' не найдена")
+                self._events.emit(WARNING, 'isbn_not_found',
+                                  "Книга с ISBN '{isbn}' не найдена", isbn=identifier)
                 return False
         else:
-            print(f"Неверный идентификатор: {type(identifier)}")
+            self._events.emit(ERROR, 'invalid_identifier',
+                              "Неверный идентификатор: {kind}", kind=type(identifier))
             return False
         
         removed_from_collection = self._books.remove_book(book)
         removed_from_index = self._index.remove_book(book)
         
+        if removed_from_collection or removed_from_index:
+            self._invalidate((book,))
+        
         if removed_from_collection and removed_from_index:
-            print(f"Книга '{book.title}' удалена из библиотеки")
+            if book._library is self:
+                book._library = None
+            self._ledger.record_return(book)
+            if isinstance(book, EBook):
+                self._downloads.remove_book(book)
+            if self._columnar is not None:
+                self._columnar.remove(book.isbn)
+            if self._journal is not None:
+                self._log('remove', book.isbn)
+            self._events.emit(INFO, 'book_removed',
+                              "Книга '{title}' удалена из библиотеки", title=book.title)
             return True
         elif removed_from_collection != removed_from_index:
-            print(f"Ошибка синхронизации при удалении книги '{book.title}'")
+            self._events.emit(ERROR, 'sync_error',
+                              "Ошибка синхронизации при удалении книги '{title}'",
+                              title=book.title)
             return False
         else:
-            print(f"Книга '{book.title}' не найдена в библиотеке")
+            self._events.emit(WARNING, 'book_not_found',
+                              "Книга '{title}' не найдена в библиотеке", title=book.title)
             return False
     
+    def _borrow_book(self, book: LibraryBook, borrower: str) -> Tuple[bool, str]:
+        """
+        Выдача книги этой библиотеки: проверка, изменение книги и
+        индексы одним шагом. Возвращает (выдана ли, сообщение).
+        """
+        if self._index.get(book.isbn) is not book:
+            return False, f"Книга '{book.title}' не найдена в библиотеке"
+        done, message = book._borrow(borrower)
+        if done:
+            self._book_borrowed(book, borrower)
+        return done, message
+    
+    def _return_book(self, book: LibraryBook) -> Tuple[bool, str]:
+        """Возврат книги этой библиотеки: (возвращена ли, сообщение)"""
+        if self._index.get(book.isbn) is not book:
+            return False, f"Книга '{book.title}' не найдена в библиотеке"
+        done, message = book._return()
+        if done:
+            self._book_returned(book)
+        return done, message
+    
+    def _book_borrowed(self, book: LibraryBook, borrower: str) -> None:
+        self._index.set_available(book, False)
+        loan = self._ledger.record_borrow(book, borrower, datetime.now())
+        if self._columnar is not None:
+            self._columnar.set_available(book.isbn, False, borrower)
+        if self._journal is not None:
+            self._log('borrow', book.isbn, borrower, loan.since)
+    
+    def _book_returned(self, book: LibraryBook) -> None:
+        self._index.set_available(book, True)
+        self._ledger.record_return(book)
+        if self._columnar is not None:
+            self._columnar.set_available(book.isbn, True)
+        if self._journal is not None:
+            self._log('return', book.isbn)
+    
+    def _book_downloaded(self, book: EBook) -> None:
+        self._downloads.record(book.isbn)
+        if self._columnar is not None:
+            self._columnar.set_download_count(book.isbn, book.download_count)
+    
+    def _log(self, op: str, *args) -> None:
+        self._journal_seq += 1
+        self._journal.append(self._journal_seq, op, args)
+    
+    def attach_journal(self, journal: Optional[Journal]) -> None:
+        """
+        Писать изменения в журнал (None - отключить журнал).
+        
+        В журнале не должно быть записей новее библиотеки: иначе
+        сначала replay_journal, а нумерация продолжается с last_seq.
+        """
+        if journal is not None:
+            if journal.last_seq > self._journal_seq:
+                raise ValueError(f"В журнале '{journal.path}' есть записи до №{journal.last_seq}, "
+                                 f"а библиотека знает только до №{self._journal_seq}: "
+                                 f"сначала примените его через replay_journal")
+        self._journal = journal
+    
+    def replay_journal(self, journal: Journal) -> int:
+        """
+        Применить записи журнала, которых ещё нет в библиотеке
+        (номер больше сохранённого в снимке). Возвращает их число.
+        """
+        attached, self._journal = self._journal, None
+        applied = 0
+        try:
+            for seq, op, args in journal.records():
+                if seq <= self._journal_seq:
+                    continue
+                if op == 'add':
+                    self.add_book(book_from_record(args[0]))
+                elif op == 'add_many':
+                    self.add_books(book_from_record(record) for record in args[0])
+                elif op == 'remove':
+                    self.remove_book(args[0])
+                elif op in ('borrow', 'return'):
+                    book = self._index.get(args[0])
+                    if isinstance(book, LibraryBook):
+                        if op == 'borrow':
+                            book.borrow(args[1])
+                            loan = self._ledger.get(book.isbn)
+                            if loan is not None and len(args) > 2:
+                                loan.since = args[2]
+                        else:
+                            book.return_book()
+                else:
+                    raise ValueError(f"Неизвестная операция журнала: {op}")
+                self._journal_seq = seq
+                applied += 1
+        finally:
+            self._journal = attached
+        
+        self._events.emit(INFO, 'journal_replayed',
+                          "Из журнала '{path}' применено {applied} операций",
+                          path=journal.path, applied=applied)
+        return applied
+    
+    def compact_journal(self, snapshot_path: str) -> None:
+        """
+        Свернуть журнал в снимок: снимок пишется во временный файл,
+        fsync и атомарно заменяет старый, только после этого журнал
+        очищается. Номер последней записи хранится в снимке, поэтому
+        сбой между шагами не приводит к повторному применению.
+        """
+        if self._journal is None:
+            raise ValueError("К библиотеке не подключён журнал")
+        
+        self._journal.sync()
+        temporary = snapshot_path + '.tmp'
+        self.save_snapshot(temporary)
+        fsync_path(temporary)
+        os.replace(temporary, snapshot_path)
+        fsync_path(os.path.dirname(os.path.abspath(snapshot_path)))
+        self._journal.truncate()
+    
+    @classmethod
+    def recover(cls, snapshot_path: str, journal_path: str,
+                name: str = "Главная библиотека", events: Optional[EventSink] = None,
+                **journal_options) -> 'Library':
+        """Снимок (если есть) + журнал; журнал остаётся подключённым"""
+        if os.path.exists(snapshot_path):
+            library = cls.load_snapshot(snapshot_path, events)
+        else:
+            library = cls(name, events)
+        
+        journal = Journal(journal_path, **journal_options)
+        library.replay_journal(journal)
+        library.attach_journal(journal)
+        return library
+    
     def search_by_author(self, author: str) -> List[Book]:
         self._total_operations += 1
+        if self._telemetry is not None:
+            self._telemetry.record('author', author)
         return self._index.get(author, [])
     
     def search_by_year(self, year: int) -> List[Book]:
         self._total_operations += 1
+        if self._telemetry is not None:
+            self._telemetry.record('year', year)
         return self._index.get(year, [])
     
+    def search_by_year_range(self, start: int, end: int) -> List[Book]:
+        self._total_operations += 1
+        return self._index.search_by_year_range(start, end)
+    
+    def count_by_year_range(self, start: int, end: int) -> int:
+        self._total_operations += 1
+        return self._index.count_by_year_range(start, end)
+    
     def search_by_isbn(self, isbn: str) -> Optional[Book]:
         self._total_operations += 1
         return self._index.get(isbn)
     
     def search_by_genre(self, genre: str) -> List[Book]:
         self._total_operations += 1
-        return self._books.find_by_genre(genre)
+        if self._telemetry is not None:
+            self._telemetry.record('genre', genre)
+        if self._cache is not None:
+            return self._cached(('genre', genre), (('genre', genre),),
+                                lambda: self._index.search_by_genre(genre))
+        return self._index.search_by_genre(genre)
     
     def search_by_title(self, keyword: str) -> List[Book]:
         self._total_operations += 1
+        if self._telemetry is not None:
+            self._telemetry.record('title', keyword)
+        if self._cache is not None:
+            return self._cached(('title', keyword), self._title_scopes(keyword),
+                                lambda: self._index.search_by_title(keyword))
+        return self._index.search_by_title(keyword)
+    
+    def query(self, author: Optional[str] = None, year: Optional[int] = None,
+              genre: Optional[str] = None, title_contains: Optional[str] = None,
+              available: Optional[bool] = None) -> List[Book]:
+        """
+        Поиск по нескольким условиям сразу. Начинает с самой маленькой
+        корзины индекса, пересекает с остальными по возрастанию размера
+        и проверяет название и доступность последними; план - explain().
+        """
+        self._total_operations += 1
+        plan = plan_query(self._index, len(self._books), author, year, genre,
+                          title_contains, available)
+        return execute_plan(plan, self._index, self._books)
+    
+    def explain(self, author: Optional[str] = None, year: Optional[int] = None,
+                genre: Optional[str] = None, title_contains: Optional[str] = None,
+                available: Optional[bool] = None) -> QueryPlan:
+        """План, который выбрал бы query() с теми же условиями"""
+        return plan_query(self._index, len(self._books), author, year, genre,
+                          title_contains, available)
+    
+    @staticmethod
+    def _title_scopes(keyword: str) -> list:
+        """
+        Области результата search_by_title: триграммы запроса. Название
+        с запросом внутри содержит все его триграммы, поэтому запись
+        такой книги сдвигает каждую из них. Запросы короче трёх символов
+        зависят от всех названий - область ('title',). Большая пачка
+        книг сдвигает сразу все запросы через ('title', 'all'), не
+        перебирая триграммы каждого названия.
+        """
         keyword_lower = keyword.lower()
-        results = []
-        
-        for book in self._books:
-            if keyword_lower in book.title.lower():
-                results.append(book)
+        if len(keyword_lower) < 3:
+            return [('title',)]
+        scopes = [('trigram', trigram) for trigram in TitleIndex._trigrams_of(keyword_lower)]
+        scopes.append(('title', 'all'))
+        return scopes
+    
+    def _cached(self, key: tuple, scopes: Iterable[tuple], compute) -> List[Book]:
+        """Результат из кэша, если его области не менялись; наружу отдаётся копия"""
+        generation = self._generations.total(scopes)
+        result = self._cache.get(key, generation)
+        if result is None:
+            result = compute()
+            self._cache.put(key, result, generation)
+        return list(result)
+    
+    def _invalidate(self, books: Iterable[Book]) -> None:
+        """Сдвинуть поколения областей, которые затронула запись"""
+        if self._cache is None:
+            return
+        generations = self._generations
+        books = list(books)
+        for genre in {book.genre for book in books}:
+            generations.bump(('genre', genre))
+        generations.bump(('title',))
         
-        return results
+        if len(books) > self._TITLE_BUMP_LIMIT:
+            generations.bump(('title', 'all'))
+            return
+        trigrams = set()
+        for book in books:
+            trigrams.update(TitleIndex._trigrams_of(book.title.lower()))
+        for trigram in trigrams:
+            generations.bump(('trigram', trigram))
+    
+    def enable_cache(self, maxsize: int = 1024) -> QueryCache:
+        """Включить LRU-кэш результатов search_by_title и search_by_genre"""
+        self._cache = QueryCache(maxsize)
+        return self._cache
+    
+    def available_by_author(self, author: str) -> List[Book]:
+        """Книги автора, которые можно взять сейчас"""
+        self._total_operations += 1
+        return self._index.available_by_author(author)
+    
+    def available_by_genre(self, genre: str) -> List[Book]:
+        self._total_operations += 1
+        return self._index.available_by_genre(genre)
+    
+    def available_by_year(self, year: int) -> List[Book]:
+        self._total_operations += 1
+        return self._index.available_by_year(year)
+    
+    def available_by_year_range(self, start: int, end: int) -> List[Book]:
+        self._total_operations += 1
+        return self._index.available_by_year_range(start, end)
+    
+    def count_available(self) -> int:
+        return self._index.count_available()
+    
+    def top_downloaded(self, n: int = 10) -> List[EBook]:
+        """Самые скачиваемые электронные книги, по убыванию скачиваний"""
+        self._total_operations += 1
+        books = (self._index.get(isbn) for isbn, _ in self._downloads.top(n))
+        return [book for book in books if book is not None]
+    
+    def books_borrowed_by(self, borrower: str) -> List[LibraryBook]:
+        self._total_operations += 1
+        return self._ledger.books_of(borrower)
+    
+    def get_loan(self, isbn: str) -> Optional[Loan]:
+        """Кому и когда выдана книга; None, если она не выдана"""
+        self._total_operations += 1
+        return self._ledger.get(isbn)
+    
+    def count_on_loan(self) -> int:
+        return len(self._ledger)
+    
+    @property
+    def telemetry(self) -> Optional[QueryTelemetry]:
+        return self._telemetry
+    
+    def enable_telemetry(self, telemetry: Optional[QueryTelemetry] = None) -> QueryTelemetry:
+        """Начать собирать телеметрию запросов (по умолчанию - с параметрами QueryTelemetry)"""
+        self._telemetry = telemetry if telemetry is not None else QueryTelemetry()
+        return self._telemetry
+    
+    def hot_keys(self, kind: str, n: int = 10) -> list:
+        """Самые частые ключи запросов вида kind: (ключ, счётчик, погрешность)"""
+        if self._telemetry is None:
+            raise ValueError("Телеметрия запросов не включена")
+        return self._telemetry.hot_keys(kind, n)
     
     def get_all_books(self) -> BookCollection:
         return self._books
     
+    def to_columnar(self) -> ColumnarCatalog:
+        """Отдельная колоночная копия каталога; изменения библиотеки в неё не попадают"""
+        return ColumnarCatalog.from_books(self._books)
+    
+    @property
+    def columnar(self) -> Optional[ColumnarCatalog]:
+        return self._columnar
+    
+    def enable_columnar(self) -> ColumnarCatalog:
+        """
+        Вести колоночный каталог вместе с индексами: добавление,
+        удаление, выдача, возврат и скачивание обновляют его сразу.
+        По нему работают filter_books() и count_books().
+        """
+        self._columnar = ColumnarCatalog.from_books(self._books)
+        return self._columnar
+    
+    def _require_columnar(self) -> ColumnarCatalog:
+        if self._columnar is None:
+            raise ValueError("Колоночный каталог не включён")
+        return self._columnar
+    
+    def filter_books(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                     author: Optional[str] = None, genre: Optional[str] = None,
+                     book_type: Optional[type] = None,
+                     available: Optional[bool] = None) -> List[Book]:
+        """Аналитический фильтр по колонкам; возвращает сами книги библиотеки"""
+        self._total_operations += 1
+        isbns = self._require_columnar().isbns(year_from, year_to, author, genre,
+                                               book_type, available)
+        isbn_index = self._index._isbn_index
+        return [isbn_index[isbn] for isbn in isbns]
+    
+    def count_books(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                    author: Optional[str] = None, genre: Optional[str] = None,
+                    book_type: Optional[type] = None,
+                    available: Optional[bool] = None) -> int:
+        self._total_operations += 1
+        return self._require_columnar().count(year_from, year_to, author, genre,
+                                              book_type, available)
+    
+    def save_catalog(self, path: str) -> int:
+        """Сохранить каталог в файл для открытия через open_catalog"""
+        return write_catalog(path, self._books)
+    
+    @staticmethod
+    def open_catalog(path: str) -> MappedCatalog:
+        return MappedCatalog(path)
+    
+    def save_snapshot(self, path: str) -> None:
+        from snapshot import save_snapshot
+        save_snapshot(self, path)
+    
+    @classmethod
+    def load_snapshot(cls, path: str, events: Optional[EventSink] = None) -> 'Library':
+        from snapshot import load_snapshot
+        return load_snapshot(path, events, cls)
+    
     def get_random_book(self) -> Optional[Book]:
         return self._books.get_random_book()
     
@@ -89,7 +521,16 @@ class Library:
             'total_books': len(self._books),
             'unique_authors': len(self._index._author_index),
             'unique_years': len(self._index._year_index),
+            'unique_genres': len(self._index._genre_index),
+            'min_year': self._index.min_year(),
+            'max_year': self._index.max_year(),
+            'available_books': self._index.count_available(),
+            'total_downloads': self._downloads.total,
+            'books_on_loan': len(self._ledger),
+            'borrowers': self._ledger.borrower_count,
             'total_operations': self._total_operations,
+            'cache_hits': self._cache.hits if self._cache is not None else 0,
+            'cache_misses': self._cache.misses if self._cache is not None else 0,
         }
     
     def __len__(self) -> int:
@@ -0,0 +1,121 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from book import Book
+from Сollection import IndexDict
+
+
+@dataclass
+class PlanStep:
+    """
+    Шаг плана: index - начальный набор из корзины индекса, intersect -
+    пересечение с корзиной, filter - проверка каждой книги, title -
+    начальный набор из TitleIndex, scan - все книги, empty - результат
+    заведомо пуст.
+    """
+    kind: str
+    criterion: str
+    estimate: Optional[int] = None
+    bucket: Optional[dict] = field(default=None, repr=False)
+    predicate: Optional[Callable[[Book], bool]] = field(default=None, repr=False)
+
+
+@dataclass
+class QueryPlan:
+    criteria: dict
+    steps: List[PlanStep]
+    
+    def __str__(self) -> str:
+        labels = {
+            'index': "индекс", 'intersect': "пересечение", 'filter': "фильтр",
+            'title': "индекс названий", 'scan': "полный просмотр", 'empty': "пусто",
+        }
+        criteria = ", ".join(f"{key}={value!r}" for key, value in self.criteria.items())
+        lines = [f"План запроса ({criteria or 'без условий'}):"]
+        for number, step in enumerate(self.steps, 1):
+            estimate = f": {step.estimate} книг" if step.estimate is not None else ""
+            text = " ".join(part for part in (labels[step.kind], step.criterion) if part)
+            lines.append(f"  {number}. {text}{estimate}")
+        return "\n".join(lines)
+
+
+def plan_query(index: IndexDict, total: int, author: Optional[str] = None,
+               year: Optional[int] = None, genre: Optional[str] = None,
+               title_contains: Optional[str] = None,
+               available: Optional[bool] = None) -> QueryPlan:
+    """
+    Составить план: корзины автора, года и жанра (при available=True -
+    корзины только доступных книг) сортируются по размеру, самая
+    маленькая даёт начальный набор, остальные пересекаются с ним по
+    возрастанию размера, название и доступность проверяются последними.
+    """
+    criteria = {key: value for key, value in (
+        ('author', author), ('year', year), ('genre', genre),
+        ('title_contains', title_contains), ('available', available),
+    ) if value is not None}
+    
+    only_available = available is True
+    if only_available:
+        # корзины только доступных книг
+        source = index._available
+        indexes = (source._by_author, source._by_year, source._by_genre)
+    else:
+        indexes = (index._author_index, index._year_index, index._genre_index)
+    buckets = []
+    for name, value, by_value in zip(('author', 'year', 'genre'), (author, year, genre), indexes):
+        if value is None:
+            continue
+        bucket = by_value.get(value, {})
+        label = f"{name}={value!r}" + (" (доступные)" if only_available else "")
+        buckets.append((len(bucket), label, bucket))
+    buckets.sort(key=lambda item: item[0])
+    
+    steps = []
+    if buckets and buckets[0][0] == 0:
+        return QueryPlan(criteria, [PlanStep('empty', buckets[0][1], 0)])
+    
+    for position, (size, label, bucket) in enumerate(buckets):
+        steps.append(PlanStep('index' if position == 0 else 'intersect', label, size, bucket))
+    
+    if title_contains is not None:
+        keyword = title_contains.lower()
+        if steps:
+            steps.append(PlanStep('filter', f"title_contains={title_contains!r}",
+                                  predicate=lambda book: keyword in book.title.lower()))
+        else:
+            steps.append(PlanStep('title', f"title_contains={title_contains!r}"))
+    
+    # при наличии корзин доступность уже учтена корзинами AvailabilityIndex
+    if available is not None and not (only_available and buckets):
+        estimate = index.count_available() if not steps and only_available else None
+        if not steps:
+            steps.append(PlanStep('scan', "", total))
+        steps.append(PlanStep('filter', f"available={available!r}", estimate,
+                              predicate=lambda book: book.is_available == available))
+    
+    if not steps:
+        steps.append(PlanStep('scan', "", total))
+    return QueryPlan(criteria, steps)
+
+
+def execute_plan(plan: QueryPlan, index: IndexDict, books: List[Book]) -> List[Book]:
+    """Выполнить план; books - все книги для шага scan"""
+    candidates: List[Book] = []
+    for step in plan.steps:
+        if step.kind == 'empty':
+            return []
+        if step.kind == 'index':
+            candidates = list(step.bucket.values())
+        elif step.kind == 'title':
+            candidates = index.search_by_title(plan.criteria['title_contains'])
+        elif step.kind == 'scan':
+            candidates = list(books)
+        elif step.kind == 'intersect':
+            bucket = step.bucket
+            candidates = [book for book in candidates if book.isbn in bucket]
+        else:
+            predicate = step.predicate
+            candidates = [book for book in candidates if predicate(book)]
+        if not candidates:
+            break
+    return candidates
@@ -0,0 +1,118 @@
+import json
+import math
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional
+
+from simulation import LibrarySimulation, percentile
+
+
+@dataclass
+class MultiSeedResult:
+    """Сводка по прогонам симуляции с разными seed"""
+    seeds: List[int]
+    steps: int
+    processes: int
+    elapsed_seconds: float
+    runs: List[dict]
+    event_counts: Dict[str, Dict[str, float]]
+    library_stats: Dict[str, Dict[str, float]]
+    
+    def to_dict(self) -> dict:
+        return asdict(self)
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+def _run_seed(seed: int, steps: int) -> dict:
+    """Один прогон в процессе-работнике; возвращает только данные"""
+    simulation = LibrarySimulation(seed, log_size=0, headless=True)
+    try:
+        result = simulation.run(steps)
+    finally:
+        simulation.close()
+    return {
+        'seed': seed,
+        'event_counts': result.event_counts,
+        'library_stats': result.library_stats,
+        'events_per_second': result.events_per_second,
+    }
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Распределение значения по прогонам"""
+    ordered = sorted(values)
+    return {
+        'mean': statistics.fmean(ordered),
+        'stddev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'min': ordered[0],
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1],
+    }
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _aggregate(runs: List[dict], field: str,
+               missing_is_zero: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Распределение каждого числового ключа по прогонам. None и
+    отсутствующие значения (например, min_year пустой библиотеки)
+    пропускаются; для счётчиков событий отсутствие ключа означает 0.
+    """
+    keys = sorted({key for run in runs for key, value in run[field].items() if _is_number(value)})
+    result = {}
+    for key in keys:
+        values = []
+        for run in runs:
+            value = run[field].get(key)
+            if value is None and missing_is_zero:
+                value = 0
+            if _is_number(value):
+                values.append(value)
+        result[key] = summarize(values)
+    return result
+
+
+def run_seeds(seeds: Iterable[int], steps: int = 1000,
+              processes: Optional[int] = None) -> MultiSeedResult:
+    """
+    Прогоняет headless-симуляцию для каждого seed в пуле процессов
+    и сводит счётчики событий и get_stats() в распределения.
+    Прогоны независимы, поэтому масштабирование ограничено только
+    числом ядер; seed раздаются пачками, чтобы не платить за IPC
+    на каждый короткий прогон.
+    """
+    seeds = list(seeds)
+    if not seeds:
+        raise ValueError("Нужен хотя бы один seed")
+    
+    processes = min(processes or os.cpu_count() or 1, len(seeds))
+    chunksize = max(1, math.ceil(len(seeds) / (processes * 4)))
+    
+    started = time.perf_counter()
+    if processes == 1:
+        runs = [_run_seed(seed, steps) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            runs = list(pool.map(_run_seed, seeds, [steps] * len(seeds),
+                                 chunksize=chunksize))
+    elapsed = time.perf_counter() - started
+    
+    return MultiSeedResult(
+        seeds=seeds,
+        steps=steps,
+        processes=processes,
+        elapsed_seconds=elapsed,
+        runs=runs,
+        event_counts=_aggregate(runs, 'event_counts', missing_is_zero=True),
+        library_stats=_aggregate(runs, 'library_stats'),
+    )
@@ -0,0 +1,100 @@
+import threading
+
+
+class _ReadGuard:
+    __slots__ = ('_lock',)
+    
+    def __init__(self, lock: 'RWLock'):
+        self._lock = lock
+    
+    def __enter__(self) -> None:
+        self._lock.acquire_read()
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._lock.release_read()
+
+
+class _WriteGuard:
+    __slots__ = ('_lock',)
+    
+    def __init__(self, lock: 'RWLock'):
+        self._lock = lock
+    
+    def __enter__(self) -> None:
+        self._lock.acquire_write()
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._lock.release_write()
+
+
+class RWLock:
+    """
+    Блокировка «много читателей / один писатель».
+    
+    Читатели работают параллельно, писатель - один и без читателей.
+    Ожидающий писатель не пропускает новых читателей, поэтому поток
+    запросов на чтение не может задержать запись бесконечно. Поток,
+    держащий запись, может повторно брать и запись, и чтение; взять
+    запись, держа только чтение, нельзя - это взаимоблокировка.
+    
+        with lock.read(): ...
+        with lock.write(): ...
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._read_guard = _ReadGuard(self)
+        self._write_guard = _WriteGuard(self)
+    
+    def read(self) -> _ReadGuard:
+        return self._read_guard
+    
+    def write(self) -> _WriteGuard:
+        return self._write_guard
+    
+    def acquire_read(self) -> None:
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._writer_depth += 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+    
+    def release_read(self) -> None:
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._writer_depth -= 1
+                return
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+    
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+    
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._cond.notify_all()
+    
+    def __repr__(self) -> str:
+        return (f"RWLock(читателей: {self._readers}, "
+                f"писатель: {'да' if self._writer is not None else 'нет'})")
@@ -0,0 +1,363 @@
+"""
+Сетевой доступ к Library поверх asyncio.
+
+Протокол - JSON по строкам: запрос {"id": 1, "op": "search_by_author",
+"args": {"author": "..."}}, ответ {"id": 1, "ok": true, "result": ...}
+или {"id": 1, "ok": false, "error": "..."}. Клиент может слать
+запросы, не дожидаясь ответов (конвейер); ответы приходят в порядке
+запросов. Списки книг обрезаются до args["limit"] (по умолчанию
+DEFAULT_LIMIT), полное число найденного - в поле "total". Типы
+аргументов проверяются (строки, целые числа, true/false); ошибка
+любой операции приходит ответом с "ok": false и не рвёт соединение.
+
+    python src_work/service.py --snapshot library.snap --port 7777
+
+События библиотеки пишутся в файл --log (по умолчанию отбрасываются),
+чтобы печать не занимала цикл событий. Порт, на котором сервис
+слушает (нужен при --port 0), записывается в --port-file.
+"""
+import argparse
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from book import Book, LibraryBook, EBook
+from library import Library
+from events import NullSink, BufferedFileSink, INFO, WARNING, ERROR
+
+
+DEFAULT_LIMIT = 100
+MAX_LINE = 64 * 1024
+
+
+class RequestError(Exception):
+    """Ошибка в запросе клиента: уходит в ответ, соединение не рвётся"""
+
+
+_REQUIRED = object()
+
+
+def _arg(args: dict, name: str, types: tuple, type_name: str, default):
+    """Аргумент запроса нужного типа; отсутствующий или null - default"""
+    if name not in args or args[name] is None:
+        if default is _REQUIRED:
+            raise RequestError(f"Нет аргумента '{name}'")
+        return default
+    value = args[name]
+    # bool - подкласс int, но годом или числом книг быть не может
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        raise RequestError(f"Аргумент '{name}' должен быть {type_name}")
+    return value
+
+
+def _str(args: dict, name: str, default=_REQUIRED) -> str:
+    return _arg(args, name, (str,), "строкой", default)
+
+
+def _int(args: dict, name: str, default=_REQUIRED) -> int:
+    return _arg(args, name, (int,), "целым числом", default)
+
+
+def _count(args: dict, name: str, default=_REQUIRED) -> int:
+    """Неотрицательное целое: число книг в ответе"""
+    value = _int(args, name, default)
+    if value is not None and value < 0:
+        raise RequestError(f"Аргумент '{name}' не может быть отрицательным")
+    return value
+
+
+def _bool(args: dict, name: str, default=_REQUIRED) -> bool:
+    return _arg(args, name, (bool,), "true или false", default)
+
+
+def _dict(args: dict, name: str, default=_REQUIRED) -> dict:
+    return _arg(args, name, (dict,), "объектом", default)
+
+
+def book_to_dict(book: Book) -> dict:
+    data = {
+        'type': 'book',
+        'title': book.title,
+        'author': book.author,
+        'year': book.year,
+        'genre': book.genre,
+        'isbn': book.isbn,
+        'available': book.is_available,
+    }
+    if isinstance(book, LibraryBook):
+        data.update(type='library', inventory_number=book.inventory_number,
+                    shelf_location=book.shelf_location, borrower=book.current_borrower)
+    elif isinstance(book, EBook):
+        data.update(type='ebook', file_size_mb=book.file_size_mb,
+                    format_type=book.format_type, download_count=book.download_count)
+    return data
+
+
+def book_from_dict(data: dict) -> Book:
+    args = (_str(data, 'title'), _str(data, 'author'), _int(data, 'year'),
+            _str(data, 'genre'), _str(data, 'isbn'))
+    kind = data.get('type', 'book')
+    if kind == 'library':
+        return LibraryBook(*args, _str(data, 'inventory_number'), _str(data, 'shelf_location'))
+    if kind == 'ebook':
+        size = _arg(data, 'file_size_mb', (int, float), "числом", _REQUIRED)
+        return EBook(*args, float(size), _str(data, 'format_type'))
+    if kind == 'book':
+        return Book(*args)
+    raise ValueError(f"Неизвестный тип книги: {kind}")
+
+
+class LibraryService:
+    """
+    Обработчик запросов к одной Library.
+    
+    Операции Library занимают микросекунды, поэтому выполняются
+    прямо в цикле событий, без пула потоков. Одновременно
+    обслуживается не больше max_clients соединений: остальные
+    принимаются, но их чтение стоит на паузе, пока не освободится
+    место. Если клиент не забирает ответы, чтение его запросов тоже
+    приостанавливается (контроль потока транспорта).
+    """
+    def __init__(self, library: Library, max_clients: int = 256):
+        if max_clients < 1:
+            raise ValueError("max_clients должен быть не меньше 1")
+        self.library = library
+        self.max_clients = max_clients
+        self.requests = 0
+        self._active = 0
+        self._waiting: deque = deque()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Dict[str, Callable[[dict], object]] = {
+            'search_by_author': lambda a: library.search_by_author(_str(a, 'author')),
+            'search_by_year': lambda a: library.search_by_year(_int(a, 'year')),
+            'search_by_year_range': lambda a: library.search_by_year_range(
+                _int(a, 'start'), _int(a, 'end')),
+            'count_by_year_range': lambda a: library.count_by_year_range(
+                _int(a, 'start'), _int(a, 'end')),
+            'search_by_isbn': lambda a: library.search_by_isbn(_str(a, 'isbn')),
+            'search_by_genre': lambda a: library.search_by_genre(_str(a, 'genre')),
+            'search_by_title': lambda a: library.search_by_title(_str(a, 'keyword')),
+            'get_stats': lambda a: library.get_stats(),
+            'add_book': lambda a: library.add_book(book_from_dict(_dict(a, 'book'))),
+            'remove_book': lambda a: library.remove_book(_str(a, 'isbn')),
+            'available_by_author': lambda a: library.available_by_author(_str(a, 'author')),
+            'available_by_genre': lambda a: library.available_by_genre(_str(a, 'genre')),
+            'available_by_year': lambda a: library.available_by_year(_int(a, 'year')),
+            'books_borrowed_by': lambda a: library.books_borrowed_by(_str(a, 'borrower')),
+            'count_on_loan': lambda a: library.count_on_loan(),
+            'top_downloaded': lambda a: library.top_downloaded(_count(a, 'n', 10)),
+            'query': lambda a: library.query(
+                _str(a, 'author', None), _int(a, 'year', None), _str(a, 'genre', None),
+                _str(a, 'title_contains', None), _bool(a, 'available', None)),
+            'borrow': self._borrow,
+            'return_book': self._return_book,
+        }
+    
+    def _library_book(self, isbn: str) -> LibraryBook:
+        book = self.library.search_by_isbn(isbn)
+        if book is None:
+            raise RequestError(f"Книга с ISBN '{isbn}' не найдена")
+        if not isinstance(book, LibraryBook):
+            raise RequestError(f"Книгу с ISBN '{isbn}' нельзя выдать")
+        return book
+    
+    def _borrow(self, args: dict) -> dict:
+        book = self._library_book(_str(args, 'isbn'))
+        done, message = self.library._borrow_book(book, _str(args, 'borrower'))
+        return {'done': done, 'message': message}
+    
+    def _return_book(self, args: dict) -> dict:
+        book = self._library_book(_str(args, 'isbn'))
+        done, message = self.library._return_book(book)
+        return {'done': done, 'message': message}
+    
+    def handle(self, line: bytes) -> bytes:
+        """Одна строка запроса -> одна строка ответа"""
+        self.requests += 1
+        request_id = op = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("Запрос должен быть JSON-объектом")
+            request_id = request.get('id')
+            op = request.get('op')
+            handler = self._handlers.get(op)
+            if handler is None:
+                raise RequestError(f"Неизвестная операция: {op}")
+            args = request.get('args') or {}
+            if not isinstance(args, dict):
+                raise RequestError("args должен быть JSON-объектом")
+            limit = _count(args, 'limit', DEFAULT_LIMIT)
+            result = handler(args)
+            
+            response = {'id': request_id, 'ok': True}
+            if isinstance(result, list):
+                response['total'] = len(result)
+                response['result'] = [book_to_dict(book) for book in result[:limit]]
+            elif isinstance(result, Book):
+                response['result'] = book_to_dict(result)
+            else:
+                response['result'] = result
+        except RequestError as e:
+            response = {'id': request_id, 'ok': False, 'error': str(e)}
+        except KeyError as e:
+            response = {'id': request_id, 'ok': False, 'error': f"Нет аргумента {e}"}
+        except (ValueError, TypeError) as e:
+            response = {'id': request_id, 'ok': False, 'error': f"Неверный запрос: {e}"}
+        except Exception as e:
+            # сбой одной операции не должен рвать соединение и терять ответы конвейера
+            self.library._events.emit(ERROR, 'service_error',
+                                      "Ошибка операции {op}: {error!r}",
+                                      op=op, error=e)
+            response = {'id': request_id, 'ok': False, 'error': f"Внутренняя ошибка: {e}"}
+        
+        return json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n'
+    
+    def _admit(self, protocol: '_LibraryProtocol') -> None:
+        if self._active < self.max_clients:
+            self._active += 1
+            protocol.admitted = True
+        else:
+            protocol.transport.pause_reading()
+            self._waiting.append(protocol)
+    
+    def _release(self, protocol: '_LibraryProtocol') -> None:
+        if not protocol.admitted:
+            try:
+                self._waiting.remove(protocol)
+            except ValueError:
+                pass
+            return
+        self._active -= 1
+        while self._waiting and self._active < self.max_clients:
+            waiting = self._waiting.popleft()
+            self._active += 1
+            waiting.admitted = True
+            waiting.resume()
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 7777) -> asyncio.AbstractServer:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _LibraryProtocol(self), host, port)
+        address = self._server.sockets[0].getsockname()
+        self.library._events.emit(INFO, 'service_started',
+                                  "Сервис библиотеки '{library}' слушает {host}:{port}",
+                                  library=self.library.name, host=address[0], port=address[1])
+        return self._server
+    
+    @property
+    def port(self) -> Optional[int]:
+        """Порт запущенного сервиса (None - не запущен)"""
+        if self._server is None:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+    
+    async def serve_forever(self, host: str = '127.0.0.1', port: int = 7777,
+                            port_file: Optional[str] = None) -> None:
+        server = await self.start(host, port)
+        if port_file is not None:
+            _write_port(port_file, self.port)
+        async with server:
+            await server.serve_forever()
+    
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class _LibraryProtocol(asyncio.Protocol):
+    """
+    Соединение: все целые строки, пришедшие одним куском, обрабатываются
+    подряд, ответы уходят одной записью в сокет.
+    """
+    def __init__(self, service: LibraryService):
+        self.service = service
+        self.transport: Optional[asyncio.Transport] = None
+        self.admitted = False
+        self._buffer = bytearray()
+        self._reading_paused = False
+    
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.service._admit(self)
+    
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.service._release(self)
+    
+    def data_received(self, data: bytes) -> None:
+        self._buffer += data
+        if not self.admitted:
+            return
+        self._process()
+    
+    def resume(self) -> None:
+        if not self._reading_paused:
+            self.transport.resume_reading()
+        self._process()
+    
+    def _process(self) -> None:
+        end = self._buffer.rfind(b'\n')
+        if end < 0:
+            if len(self._buffer) > MAX_LINE:
+                self._fail("Слишком длинная строка запроса")
+            return
+        
+        lines = self._buffer[:end].split(b'\n')
+        del self._buffer[:end + 1]
+        handle = self.service.handle
+        self.transport.write(b''.join(handle(line) for line in lines if line.strip()))
+    
+    def _fail(self, error: str) -> None:
+        self.service.library._events.emit(WARNING, 'service_bad_client', "{error}", error=error)
+        response = {'id': None, 'ok': False, 'error': error}
+        self.transport.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.transport.close()
+    
+    def pause_writing(self) -> None:
+        # клиент не успевает читать ответы - не читаем и его запросы
+        self._reading_paused = True
+        self.transport.pause_reading()
+    
+    def resume_writing(self) -> None:
+        self._reading_paused = False
+        if self.admitted:
+            self.transport.resume_reading()
+
+
+def _write_port(path: str, port: int) -> None:
+    """Порт в файл целиком: читатель не увидит пустой или недописанный файл"""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(f"{port}\n")
+    os.replace(temporary, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сервис библиотеки")
+    parser.add_argument('--snapshot', help="снимок библиотеки (save_snapshot)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--max-clients', type=int, default=256)
+    parser.add_argument('--log', help="файл событий библиотеки")
+    parser.add_argument('--port-file', help="куда записать порт после запуска")
+    args = parser.parse_args()
+    
+    events = BufferedFileSink(args.log) if args.log else NullSink()
+    if args.snapshot:
+        library = Library.load_snapshot(args.snapshot, events)
+    else:
+        library = Library(events=events)
+    service = LibraryService(library, max_clients=args.max_clients)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port, args.port_file))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        events.close()
+
+
+if __name__ == "__main__":
+    main()
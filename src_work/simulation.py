@@ -1,22 +1,84 @@
+import json
 import random
-from datetime import datetime
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
 from typing import Optional, Dict, List
 from library import Library
 from book import Book, LibraryBook, EBook
+from events import BackgroundFileWriter, NullSink
+
+
+@dataclass
+class SimulationResult:
+    """Машиночитаемый итог прогона симуляции"""
+    seed: Optional[int]
+    steps: int
+    elapsed_seconds: float
+    events_per_second: float
+    event_counts: Dict[str, int]
+    latency_us: Dict[str, Dict[str, float]]
+    library_stats: dict
+    
+    def to_dict(self) -> dict:
+        return asdict(self)
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1,
+                      int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
 
 
 class LibrarySimulation:
-    def __init__(self, seed: Optional[int] = None):
+    """
+    Симуляция событий библиотеки.
+
+    Журнал событий - кольцевой буфер из log_size последних записей.
+    Запись хранит шаг, секунду, шаблон и аргументы; текст собирается
+    только при чтении (get_log), выводе в консоль (echo) или в фоновом
+    писателе, если задан log_path.
+
+    В режиме headless симуляция ничего не выводит в консоль, а run()
+    замеряет задержку каждого события (выборка до latency_samples
+    значений на тип) и возвращает SimulationResult.
+    """
+    def __init__(self, seed: Optional[int] = None, log_size: int = 10000,
+                 log_path: Optional[str] = None, echo: bool = True,
+                 headless: bool = False, latency_samples: int = 100000):
         if seed is not None:
             random.seed(seed)
             self._seed = seed
         else:
             self._seed = None
         
-        self.library = Library("Тестоавя библиотека")
+        self._headless = headless
+        self.library = Library("Тестоавя библиотека",
+                               events=NullSink() if headless else None)
         self._step = 0
-        self._log: List[str] = []
+        self._log: deque = deque(maxlen=log_size)
+        self._echo = echo and not headless
+        self._timestamp_cache = (None, "")
+        self._writer = (BackgroundFileWriter(log_path, self._format_entry)
+                        if log_path is not None else None)
         self._event_counts: Dict[str, int] = {}
+        self._events = [
+            self._event_add_book,
+            self._event_remove_random_book,
+            self._event_search_random_author,
+            self._event_search_random_year,
+            self._event_search_nonexistent,
+            self._event_check_statistics,
+        ]
+        self._latency_samples = latency_samples
+        self._latencies: Dict[str, List[int]] = {}
+        self._latency_seen: Dict[str, int] = {}
+        self._sampler = random.Random(0)
         
         self._initialize_library()
     
@@ -63,13 +125,34 @@ class LibrarySimulation:
         for book in initial_books:
             self.library.add_book(book)
         
-        self._log_event(f"Инициализация: добавлено {len(initial_books)} начальных книг")
+        self._log_event("Инициализация: добавлено {} начальных книг", len(initial_books))
+    
+    def _log_event(self, template: str, *args) -> None:
+        entry = (self._step, int(time.time()), template, args)
+        self._log.append(entry)
+        
+        if self._writer is not None:
+            self._writer.submit(entry)
+        if self._echo:
+            print(self._format_entry(entry))
+    
+    def _timestamp(self, second: int) -> str:
+        cached_second, text = self._timestamp_cache
+        if cached_second != second:
+            text = time.strftime("%H:%M:%S", time.localtime(second))
+            self._timestamp_cache = (second, text)
+        return text
+    
+    def _format_entry(self, entry: tuple) -> str:
+        step, second, template, args = entry
+        return f"[Шаг {step:3d} | {self._timestamp(second)}] {template.format(*args)}"
     
-    def _log_event(self, message: str) -> None:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[Шаг {self._step:3d} | {timestamp}] {message}"
-        self._log.append(log_entry)
-        print(log_entry)
+    def get_log(self) -> List[str]:
+        return [self._format_entry(entry) for entry in self._log]
+    
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
     
     def _count_event(self, event_type: str) -> None:
         self._event_counts[event_type] = self._event_counts.get(event_type, 0) + 1
@@ -115,10 +198,10 @@ class LibrarySimulation:
         success = self.library.add_book(new_book)
         
         if success:
-            self._log_event(f"Добавлена книга: '{new_book.title}' ({type(new_book).__name__})")
+            self._log_event("Добавлена книга: '{}' ({})", new_book.title, type(new_book).__name__)
             self._count_event("add_book")
         else:
-            self._log_event(f"Не удалось добавить книгу (возможно, дубликат ISBN)")
+            self._log_event("Не удалось добавить книгу (возможно, дубликат ISBN)")
             self._count_event("add_book_failed")
     
     def _event_remove_random_book(self) -> None:
@@ -126,41 +209,39 @@ class LibrarySimulation:
         if book:
             success = self.library.remove_book(book)
             if success:
-                self._log_event(f"Удалена книга: '{book.title}'")
+                self._log_event("Удалена книга: '{}'", book.title)
                 self._count_event("remove_book")
             else:
-                self._log_event(f"Не удалось удалить книгу: '{book.title}'")
+                self._log_event("Не удалось удалить книгу: '{}'", book.title)
                 self._count_event("remove_book_failed")
         else:
             self._log_event("Нечего удалять (библиотека пуста)")
             self._count_event("remove_book_empty")
     
     def _event_search_random_author(self) -> None:
-        all_books = list(self.library.get_all_books())
-        if not all_books:
+        random_book = self.library.get_random_book()
+        if random_book is None:
             self._log_event("Поиск невозможен: библиотека пуста")
             self._count_event("search_empty")
             return
         
-        random_book = random.choice(all_books)
         author = random_book.author
         
         results = self.library.search_by_author(author)
-        self._log_event(f"Поиск по автору '{author}': найдено {len(results)} книг")
+        self._log_event("Поиск по автору '{}': найдено {} книг", author, len(results))
         self._count_event("search_author")
     
     def _event_search_random_year(self) -> None:
-        all_books = list(self.library.get_all_books())
-        if not all_books:
+        random_book = self.library.get_random_book()
+        if random_book is None:
             self._log_event("Поиск невозможен: библиотека пуста")
             self._count_event("search_empty")
             return
         
-        random_book = random.choice(all_books)
         year = random_book.year
         
         results = self.library.search_by_year(year)
-        self._log_event(f"Поиск по году {year}: найдено {len(results)} книг")
+        self._log_event("Поиск по году {}: найдено {} книг", year, len(results))
         self._count_event("search_year")
     
     def _event_search_nonexistent(self) -> None:
@@ -168,32 +249,61 @@ class LibrarySimulation:
         fake_author = random.choice(fake_authors)
         
         results = self.library.search_by_author(fake_author)
-        self._log_event(f"Поиск несуществующего автора '{fake_author}': найдено {len(results)} книг")
+        self._log_event("Поиск несуществующего автора '{}': найдено {} книг",
+                        fake_author, len(results))
         self._count_event("search_nonexistent")
     
     def _event_check_statistics(self) -> None:
         stats = self.library.get_stats()
-        self._log_event(f"Статистика: {stats['total_books']} книг, "
-                       f"{stats['unique_authors']} авторов, "
-                       f"{stats['unique_years']} лет издания")
+        self._log_event("Статистика: {} книг, {} авторов, {} лет издания",
+                        stats['total_books'], stats['unique_authors'], stats['unique_years'])
         self._count_event("check_stats")
     
     def run_step(self) -> None:
         self._step += 1
         
-        events = [
-            self._event_add_book,
-            self._event_remove_random_book,
-            self._event_search_random_author,
-            self._event_search_random_year,
-            self._event_search_nonexistent,
-            self._event_check_statistics,
-        ]
+        chosen_event = random.choice(self._events)
+        chosen_event()
+    
+    def _run_step_timed(self) -> None:
+        self._step += 1
         
-        chosen_event = random.choice(events)
+        chosen_event = random.choice(self._events)
+        started = time.perf_counter_ns()
         chosen_event()
+        self._record_latency(chosen_event.__name__, time.perf_counter_ns() - started)
+    
+    def _record_latency(self, event_name: str, latency_ns: int) -> None:
+        """Reservoir sampling: память на тип события ограничена"""
+        seen = self._latency_seen.get(event_name, 0) + 1
+        self._latency_seen[event_name] = seen
+        samples = self._latencies.setdefault(event_name, [])
+        
+        if len(samples) < self._latency_samples:
+            samples.append(latency_ns)
+        else:
+            slot = self._sampler.randrange(seen)
+            if slot < self._latency_samples:
+                samples[slot] = latency_ns
+    
+    def _latency_summary(self) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for event_name, samples in sorted(self._latencies.items()):
+            values = sorted(ns / 1000 for ns in samples)
+            summary[event_name[len('_event_'):]] = {
+                'count': self._latency_seen[event_name],
+                'mean': sum(values) / len(values),
+                'p50': percentile(values, 50),
+                'p90': percentile(values, 90),
+                'p99': percentile(values, 99),
+                'max': values[-1],
+            }
+        return summary
     
-    def run(self, steps: int = 20) -> None:
+    def run(self, steps: int = 20) -> Optional[SimulationResult]:
+        if self._headless:
+            return self._run_headless(steps)
+        
         print("\n" + "="*60)
         print(f"НАЧАЛО СИМУЛЯЦИИ БИБЛИОТЕКИ")
         print(f"Seed: {self._seed if self._seed is not None else 'случайный'}")
@@ -204,6 +314,24 @@ class LibrarySimulation:
             self.run_step()
         
         self._print_summary()
+        return None
+    
+    def _run_headless(self, steps: int) -> SimulationResult:
+        run_step = self._run_step_timed
+        started = time.perf_counter()
+        for _ in range(steps):
+            run_step()
+        elapsed = time.perf_counter() - started
+        
+        return SimulationResult(
+            seed=self._seed,
+            steps=steps,
+            elapsed_seconds=elapsed,
+            events_per_second=steps / elapsed if elapsed > 0 else 0.0,
+            event_counts=dict(sorted(self._event_counts.items())),
+            latency_us=self._latency_summary(),
+            library_stats=self.library.get_stats(),
+        )
     
     def _print_summary(self) -> None:
         print("\n" + "="*60)
@@ -232,6 +360,10 @@ class LibrarySimulation:
         print("="*60)
 
 
-def run_simulation(steps: int = 20, seed: Optional[int] = None) -> None:
-    simulation = LibrarySimulation(seed)
-    simulation.run(steps)
\ No newline at end of file
+def run_simulation(steps: int = 20, seed: Optional[int] = None,
+                   headless: bool = False) -> Optional[SimulationResult]:
+    simulation = LibrarySimulation(seed, headless=headless)
+    try:
+        return simulation.run(steps)
+    finally:
+        simulation.close()
\ No newline at end of file
@@ -0,0 +1,219 @@
+import gc
+import pickle
+from array import array
+from datetime import date
+from operator import itemgetter
+from typing import List, Optional, Type
+
+from book import LibraryBook, EBook, Book
+from events import EventSink
+from library import Library
+
+
+SNAPSHOT_MAGIC = b'LIBSNAP1'
+SNAPSHOT_VERSION = 2
+# версия 1 не хранит списки TitleIndex и AvailabilityIndex, они строятся при загрузке
+_READABLE_VERSIONS = (1, 2)
+
+
+def _pick(values: list, rows: List[int]) -> list:
+    if not rows:
+        return []
+    if len(rows) == 1:
+        return [values[rows[0]]]
+    return list(itemgetter(*rows)(values))
+
+
+def _bucket_rows(index: dict, row_of: dict) -> list:
+    return [(key, [row_of[isbn] for isbn in bucket]) for key, bucket in index.items()]
+
+
+def _title_postings(title_index, order: List[str]) -> tuple:
+    """Списки TitleIndex в номерах order: пустые места удалённых книг выбрасываются"""
+    if not title_index._removed:
+        return title_index._tokens, title_index._trigrams
+    
+    renumber: List[Optional[int]] = [None] * len(title_index._books)
+    seqs = title_index._seqs
+    for position, isbn in enumerate(order):
+        renumber[seqs[isbn]] = position
+    
+    def compact(postings: dict) -> dict:
+        result = {}
+        for key, seq_list in postings.items():
+            kept = array('I', (renumber[seq] for seq in seq_list if renumber[seq] is not None))
+            if kept:
+                result[key] = kept
+        return result
+    
+    return compact(title_index._tokens), compact(title_index._trigrams)
+
+
+def save_snapshot(library: Library, path: str) -> None:
+    """
+    Снимок состояния библиотеки.
+    
+    Книги пишутся колонками (строки, годы, даты как ordinal), индексы
+    IndexDict - как списки номеров строк в исходном порядке корзин,
+    поэтому при загрузке словари собираются целиком из готовых
+    списков, без add_book и без вывода на каждую книгу. Так же
+    хранятся корзины AvailabilityIndex и списки слов и триграмм
+    TitleIndex, так что загрузка не перестраивает ни один индекс.
+    """
+    books = library._books._books
+    row_of = {book.isbn: row for row, book in enumerate(books)}
+    
+    kinds = bytearray()
+    extras = []
+    for book in books:
+        if isinstance(book, LibraryBook):
+            kinds.append(1)
+            extras.append((book.inventory_number, book.shelf_location,
+                           book.is_borrowed, book.current_borrower))
+        elif isinstance(book, EBook):
+            kinds.append(2)
+            extras.append((book.file_size_mb, book.format_type, book.download_count))
+        else:
+            kinds.append(0)
+            extras.append(None)
+    
+    index = library._index
+    title_index = index._title_index
+    title_order = sorted(title_index._seqs, key=title_index._seqs.__getitem__)
+    title_tokens, title_trigrams = _title_postings(title_index, title_order)
+    available = index._available
+    
+    state = {
+        'version': SNAPSHOT_VERSION,
+        'name': library.name,
+        'total_operations': library._total_operations,
+        'journal_seq': library._journal_seq,
+        'kinds': bytes(kinds),
+        'titles': [book.title for book in books],
+        'authors': [book.author for book in books],
+        'years': [book.year for book in books],
+        'genres': [book.genre for book in books],
+        'isbns': [book.isbn for book in books],
+        'dates': [book.date_added.toordinal() for book in books],
+        'available': bytes(book.is_available for book in books),
+        'extras': extras,
+        'author_rows': _bucket_rows(index._author_index, row_of),
+        'year_rows': _bucket_rows(index._year_index, row_of),
+        'genre_rows': _bucket_rows(index._genre_index, row_of),
+        'title_rows': [row_of[isbn] for isbn in title_order],
+        'title_tokens': title_tokens,
+        'title_trigrams': title_trigrams,
+        'available_author_rows': _bucket_rows(available._by_author, row_of),
+        'available_year_rows': _bucket_rows(available._by_year, row_of),
+        'available_genre_rows': _bucket_rows(available._by_genre, row_of),
+        'loans': [(loan.book.isbn, loan.since) for loan in library._ledger],
+    }
+    
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _restore_books(state: dict) -> List[Book]:
+    dates: dict[int, date] = {}
+    books = []
+    append = books.append
+    
+    for kind, title, author, year, genre, isbn, ordinal, available, extra in zip(
+            state['kinds'], state['titles'], state['authors'], state['years'],
+            state['genres'], state['isbns'], state['dates'], state['available'],
+            state['extras']):
+        date_added = dates.get(ordinal)
+        if date_added is None:
+            date_added = dates[ordinal] = date.fromordinal(ordinal)
+        
+        if kind == 1:
+            book = LibraryBook(title, author, year, genre, isbn, extra[0], extra[1], date_added)
+            book.is_borrowed = extra[2]
+            book.current_borrower = extra[3]
+        elif kind == 2:
+            book = EBook(title, author, year, genre, isbn, extra[0], extra[1], date_added)
+            book.download_count = extra[2]
+        else:
+            book = Book(title, author, year, genre, isbn, date_added)
+        
+        book.is_available = bool(available)
+        append(book)
+    
+    return books
+
+
+def load_snapshot(path: str, events: Optional[EventSink] = None,
+                  library_class: Type[Library] = Library) -> Library:
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"Файл '{path}' не является снимком библиотеки")
+        
+        # миллионы новых объектов иначе раз за разом запускают сборщик мусора
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            state = pickle.load(f)
+            if state.get('version') not in _READABLE_VERSIONS:
+                raise ValueError(f"Неподдерживаемая версия снимка: {state.get('version')}")
+            library = _restore(state, events, library_class)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    
+    return library
+
+
+def _restore(state: dict, events: Optional[EventSink],
+             library_class: Type[Library]) -> Library:
+    books = _restore_books(state)
+    isbns = state['isbns']
+    
+    library = library_class(state['name'], events=events)
+    library._total_operations = state['total_operations']
+    library._journal_seq = state.get('journal_seq', 0)
+    
+    collection = library._books
+    collection._books = books
+    for book in books:
+        book._library = library
+    collection._positions = dict(zip(isbns, range(len(isbns))))
+    
+    def buckets(key: str) -> dict:
+        return {value: dict(zip(_pick(isbns, rows), _pick(books, rows)))
+                for value, rows in state[key]}
+    
+    index = library._index
+    index._isbn_index = dict(zip(isbns, books))
+    index._author_index = buckets('author_rows')
+    index._year_index = buckets('year_rows')
+    index._genre_index = buckets('genre_rows')
+    index._sorted_years = sorted(index._year_index)
+    library._downloads.add_books(books)
+    
+    title_books = _pick(books, state['title_rows'])
+    available = index._available
+    title_index = index._title_index
+    if state['version'] == 1:
+        available.rebuild(index._author_index, index._year_index, index._genre_index)
+        title_index.add_books(title_books)
+    else:
+        available._by_author = buckets('available_author_rows')
+        available._by_year = buckets('available_year_rows')
+        available._by_genre = buckets('available_genre_rows')
+        available._count = sum(map(len, available._by_author.values()))
+        
+        title_index._books = title_books
+        title_index._titles = [book.title.lower() for book in title_books]
+        title_index._seqs = {book.isbn: seq for seq, book in enumerate(title_books)}
+        title_index._tokens = state['title_tokens']
+        title_index._trigrams = state['title_trigrams']
+    
+    if 'loans' in state:
+        for isbn, since in state['loans']:
+            book = index._isbn_index[isbn]
+            library._ledger.record_borrow(book, book.current_borrower, since)
+    else:
+        library._ledger.add_books(books)
+    
+    return library
@@ -0,0 +1,169 @@
+import heapq
+import threading
+from typing import Dict, Hashable, List, Tuple
+
+
+class CountMinSketch:
+    """
+    Частоты ключей в фиксированной памяти: depth строк по width
+    счётчиков. Оценка никогда не меньше истинной частоты и завышена
+    не больше чем на e/width * total с вероятностью 1 - e^-depth.
+    """
+    def __init__(self, width: int = 2048, depth: int = 4):
+        if width < 1 or depth < 1:
+            raise ValueError("width и depth должны быть не меньше 1")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._rows = [[0] * width for _ in range(depth)]
+    
+    @staticmethod
+    def _hashes(key: Hashable) -> Tuple[int, int]:
+        # двойное хеширование: столбец строки i - (first + i * step) % width;
+        # хеш перемешивается умножением (у int он равен самому числу),
+        # шаг берётся из старших бит
+        first = (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return first, (first >> 32) | 1
+    
+    def add(self, key: Hashable, count: int = 1) -> None:
+        self.total += count
+        column, step = self._hashes(key)
+        width = self.width
+        for row in self._rows:
+            row[column % width] += count
+            column += step
+    
+    def estimate(self, key: Hashable) -> int:
+        column, step = self._hashes(key)
+        width = self.width
+        result = None
+        for row in self._rows:
+            value = row[column % width]
+            if result is None or value < result:
+                result = value
+            column += step
+        return result
+    
+    def clear(self) -> None:
+        self.total = 0
+        for row in self._rows:
+            row[:] = [0] * self.width
+    
+    def __repr__(self) -> str:
+        return f"CountMinSketch({self.width}x{self.depth}, событий: {self.total})"
+
+
+class SpaceSaving:
+    """
+    Top-k частых ключей (алгоритм Space-Saving) в памяти O(k).
+    
+    Новый ключ при заполненной таблице вытесняет ключ с наименьшим
+    счётчиком и наследует его счётчик как погрешность. Минимум ищется
+    по min-куче, которую рост счётчиков не трогает: записи уточняются
+    только при вытеснении.
+    """
+    def __init__(self, k: int = 64):
+        if k < 1:
+            raise ValueError("k должен быть не меньше 1")
+        self.k = k
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._tick = 0
+    
+    def add(self, key: Hashable, count: int = 1) -> None:
+        counts = self._counts
+        if key in counts:
+            counts[key] += count
+            return
+        
+        heap = self._heap
+        self._tick += 1
+        if len(counts) < self.k:
+            counts[key] = count
+            self._errors[key] = 0
+            heapq.heappush(heap, (count, self._tick, key))
+            return
+        
+        # в куче по одной записи на ключ, счётчик в ней - нижняя граница;
+        # выросшие записи поднимаются, пока на вершине не окажется точный минимум
+        while True:
+            floor, tick, evicted = heap[0]
+            current = counts[evicted]
+            if current == floor:
+                break
+            heapq.heapreplace(heap, (current, tick, evicted))
+        
+        del counts[evicted]
+        del self._errors[evicted]
+        counts[key] = floor + count
+        self._errors[key] = floor
+        heapq.heapreplace(heap, (floor + count, self._tick, key))
+    
+    def top(self, n: int = 10) -> List[Tuple[Hashable, int, int]]:
+        """(ключ, счётчик, погрешность) по убыванию; истинная частота в [счётчик - погрешность, счётчик]"""
+        ranked = heapq.nlargest(n, self._counts.items(), key=lambda item: item[1])
+        return [(key, count, self._errors[key]) for key, count in ranked]
+    
+    def clear(self) -> None:
+        self._counts.clear()
+        self._errors.clear()
+        self._heap.clear()
+    
+    def __len__(self) -> int:
+        return len(self._counts)
+    
+    def __repr__(self) -> str:
+        return f"SpaceSaving(k={self.k}, ключей: {len(self)})"
+
+
+class QueryTelemetry:
+    """
+    Телеметрия поисковых запросов Library.
+    
+    Для каждого вида запроса (author, year, title, genre) ключи
+    попадают в CountMinSketch (оценка частоты любого ключа) и в
+    SpaceSaving (горячие ключи). Память фиксирована и не растёт с
+    числом разных ключей.
+    """
+    KINDS = ('author', 'year', 'title', 'genre')
+    
+    def __init__(self, width: int = 2048, depth: int = 4, k: int = 64):
+        self._sketches = {kind: CountMinSketch(width, depth) for kind in self.KINDS}
+        self._heavy = {kind: SpaceSaving(k) for kind in self.KINDS}
+        self._lock = threading.Lock()
+    
+    def _check(self, kind: str) -> None:
+        if kind not in self._sketches:
+            raise ValueError(f"Неизвестный вид запроса: {kind}")
+    
+    def record(self, kind: str, key: Hashable) -> None:
+        with self._lock:
+            self._sketches[kind].add(key)
+            self._heavy[kind].add(key)
+    
+    def estimate(self, kind: str, key: Hashable) -> int:
+        self._check(kind)
+        with self._lock:
+            return self._sketches[kind].estimate(key)
+    
+    def hot_keys(self, kind: str, n: int = 10) -> List[Tuple[Hashable, int, int]]:
+        self._check(kind)
+        with self._lock:
+            return self._heavy[kind].top(n)
+    
+    def summary(self, n: int = 5) -> dict:
+        with self._lock:
+            return {kind: {'queries': self._sketches[kind].total,
+                           'hot': self._heavy[kind].top(n)}
+                    for kind in self.KINDS}
+    
+    def clear(self) -> None:
+        with self._lock:
+            for kind in self.KINDS:
+                self._sketches[kind].clear()
+                self._heavy[kind].clear()
+    
+    def __repr__(self) -> str:
+        totals = ", ".join(f"{kind}: {self._sketches[kind].total}" for kind in self.KINDS)
+        return f"QueryTelemetry({totals})"
@@ -1,15 +1,28 @@
-from typing import Union, List, Optional, Iterator
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Union, List, Optional, Iterator, Iterable
 from book import Book
+from events import EventSink, ConsoleSink, INFO, WARNING
 
 
 class BookCollection:
     """
     Пользовательская списочная коллекция книг.
+
+    Помимо списка хранит карту ISBN -> позиция, поэтому проверка
+    наличия, удаление и случайный выбор выполняются за O(1).
+    Порядок итерации совпадает с порядком добавления, пока книги
+    не удаляются: при удалении на место удалённой книги переносится
+    последняя книга коллекции (swap-remove), поэтому после удалений
+    порядок не гарантируется.
     """
     def __init__(self, books: Optional[List[Book]] = None):
         self._books: List[Book] = []
+        self._positions: dict[str, int] = {}
         if books:
-            self._books.extend(books)
+            for book in books:
+                self.add_book(book)
     
     def __getitem__(self, key: Union[int, slice]) -> Union[Book, 'BookCollection']:
         if isinstance(key, slice):
@@ -30,17 +43,46 @@ class BookCollection:
         return f"BookCollection([{', '.join(book_titles)}])"
     
     def __contains__(self, item: Book) -> bool:
-        return item in self._books
+        position = self._positions.get(getattr(item, 'isbn', None))
+        return position is not None and self._books[position] is item
     
-    def add_book(self, book: Book) -> None:
+    def add_book(self, book: Book) -> bool:
+        if book.isbn in self._positions:
+            return False
+        
+        self._positions[book.isbn] = len(self._books)
         self._books.append(book)
+        return True
+    
+    def add_books(self, books: Iterable[Book]) -> int:
+        """Пакетное добавление; книги с уже известным ISBN пропускаются"""
+        positions = self._positions
+        new_books = []
+        position = len(self._books)
+        
+        for book in books:
+            if book.isbn in positions:
+                continue
+            positions[book.isbn] = position
+            new_books.append(book)
+            position += 1
+        
+        self._books.extend(new_books)
+        return len(new_books)
     
     def remove_book(self, book: Book) -> bool:
-        try:
-            self._books.remove(book)
-            return True
-        except ValueError:
+        position = self._positions.get(book.isbn)
+        if position is None or self._books[position] is not book:
             return False
+        
+        last_book = self._books.pop()
+        del self._positions[book.isbn]
+        
+        if last_book is not book:
+            self._books[position] = last_book
+            self._positions[last_book.isbn] = position
+        
+        return True
     
     def get_random_book(self) -> Optional[Book]:
         import random
@@ -52,25 +94,301 @@ class BookCollection:
         return [book for book in self._books if book.genre == genre]
 
 
+class TitleIndex:
+    """
+    Инвертированный индекс названий: слова и символьные триграммы.
+
+    Поиск совпадает с проверкой `keyword.lower() in title.lower()`.
+    Для запросов от трёх символов кандидаты - самый короткий из
+    списков триграмм запроса, для коротких - объединение списков
+    слов, содержащих запрос. Кандидаты всегда проверяются подстрокой.
+    Если индекс почти не сужает поиск, сканируются заранее
+    приведённые к нижнему регистру названия.
+
+    Книге выдаётся порядковый номер, списки - array('I') номеров по
+    возрастанию, только с дозаписью. Удалённая книга остаётся в
+    списках как пустое место (None в _books) и отсеивается при
+    поиске; когда пустых мест больше, чем книг, индекс собирается
+    заново.
+
+    Списки строятся сразу при добавлении (add_books - одним проходом
+    по пачке), поэтому поиск никогда не меняет индекс и первый запрос
+    после массовой загрузки стоит столько же, сколько любой другой.
+    """
+    _TOKEN_RE = re.compile(r"\w+")
+    _SCAN_RATIO = 8
+    _COMPACT_MIN = 1024
+    
+    def __init__(self):
+        self._seqs: dict[str, int] = {}
+        self._books: List[Optional[Book]] = []
+        self._titles: List[Optional[str]] = []
+        self._removed = 0
+        self._tokens: dict[str, array] = {}
+        self._trigrams: dict[str, array] = {}
+    
+    def __len__(self) -> int:
+        return len(self._seqs)
+    
+    @staticmethod
+    def _trigrams_of(text: str) -> set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def add_book(self, book: Book) -> None:
+        if book.isbn not in self._seqs:
+            self._index((book,))
+    
+    def add_books(self, books: Iterable[Book]) -> None:
+        seqs = self._seqs
+        self._index([book for book in books if book.isbn not in seqs])
+    
+    def remove_book(self, book: Book) -> None:
+        seq = self._seqs.pop(book.isbn, None)
+        if seq is None:
+            return
+        
+        self._books[seq] = None
+        self._titles[seq] = None
+        self._removed += 1
+        if self._removed > max(self._COMPACT_MIN, len(self._seqs)):
+            self._compact()
+    
+    def _compact(self) -> None:
+        """Пересобрать списки без удалённых книг"""
+        books = [book for book in self._books if book is not None]
+        self._seqs.clear()
+        self._books = []
+        self._titles = []
+        self._removed = 0
+        self._tokens.clear()
+        self._trigrams.clear()
+        self._index(books)
+    
+    def clear(self) -> None:
+        self._seqs.clear()
+        self._books = []
+        self._titles = []
+        self._removed = 0
+        self._tokens.clear()
+        self._trigrams.clear()
+    
+    def _index(self, books: Iterable[Book]) -> None:
+        """Разнести книги по спискам слов и триграмм"""
+        seqs = self._seqs
+        all_books = self._books
+        titles = self._titles
+        tokens = self._tokens
+        trigrams = self._trigrams
+        find_tokens = self._TOKEN_RE.findall
+        seq = len(all_books)
+        
+        for book in books:
+            title_lower = book.title.lower()
+            seqs[book.isbn] = seq
+            all_books.append(book)
+            titles.append(title_lower)
+            
+            for token in set(find_tokens(title_lower)):
+                postings = tokens.get(token)
+                if postings is None:
+                    tokens[token] = array('I', (seq,))
+                else:
+                    postings.append(seq)
+            
+            for trigram in {title_lower[i:i + 3] for i in range(len(title_lower) - 2)}:
+                postings = trigrams.get(trigram)
+                if postings is None:
+                    trigrams[trigram] = array('I', (seq,))
+                else:
+                    postings.append(seq)
+            
+            seq += 1
+    
+    def _candidates(self, keyword_lower: str) -> Optional[Iterable[int]]:
+        """Номера-кандидаты по возрастанию; None - индекс не сужает поиск"""
+        scan_limit = len(self._books) // self._SCAN_RATIO
+        
+        if len(keyword_lower) >= 3:
+            smallest = None
+            for trigram in self._trigrams_of(keyword_lower):
+                postings = self._trigrams.get(trigram)
+                if postings is None:
+                    return ()
+                if smallest is None or len(postings) < len(smallest):
+                    smallest = postings
+            return smallest if len(smallest) <= scan_limit else None
+        
+        if self._TOKEN_RE.fullmatch(keyword_lower):
+            candidates = set()
+            for token, postings in self._tokens.items():
+                if keyword_lower in token:
+                    candidates.update(postings)
+                    if len(candidates) > scan_limit:
+                        return None
+            return sorted(candidates)
+        
+        return None
+    
+    def search(self, keyword: str) -> List[Book]:
+        """Книги, в названии которых есть keyword, в порядке добавления"""
+        keyword_lower = keyword.lower()
+        candidates = self._candidates(keyword_lower)
+        books = self._books
+        titles = self._titles
+        
+        if candidates is None:
+            return [book for book, title_lower in zip(books, titles)
+                    if title_lower is not None and keyword_lower in title_lower]
+        
+        results = []
+        for seq in candidates:
+            title_lower = titles[seq]
+            if title_lower is not None and keyword_lower in title_lower:
+                results.append(books[seq])
+        return results
+
+
+class AvailabilityIndex:
+    """
+    Доступные книги по автору, жанру и году.
+    
+    Те же корзины ISBN -> книга, что и в IndexDict, но только для
+    книг с is_available. Обновляется при добавлении, удалении, выдаче
+    и возврате, поэтому «что можно взять сейчас» стоит O(результата),
+    а не фильтрации всей корзины.
+    """
+    def __init__(self):
+        self._by_author: dict[str, dict[str, Book]] = {}
+        self._by_genre: dict[str, dict[str, Book]] = {}
+        self._by_year: dict[int, dict[str, Book]] = {}
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __repr__(self) -> str:
+        return f"AvailabilityIndex(доступно: {len(self)})"
+    
+    def add_book(self, book: Book) -> None:
+        if not book.is_available:
+            return
+        bucket = self._by_author.setdefault(book.author, {})
+        if book.isbn in bucket:
+            return
+        bucket[book.isbn] = book
+        self._by_genre.setdefault(book.genre, {})[book.isbn] = book
+        self._by_year.setdefault(book.year, {})[book.isbn] = book
+        self._count += 1
+    
+    def add_books(self, books: Iterable[Book]) -> None:
+        """Пачка новых книг (ещё не в индексе), без вызова add_book на каждую"""
+        by_author, by_genre, by_year = self._by_author, self._by_genre, self._by_year
+        added = 0
+        for book in books:
+            if not book.is_available:
+                continue
+            isbn = book.isbn
+            bucket = by_author.get(book.author)
+            if bucket is None:
+                bucket = by_author[book.author] = {}
+            bucket[isbn] = book
+            bucket = by_genre.get(book.genre)
+            if bucket is None:
+                bucket = by_genre[book.genre] = {}
+            bucket[isbn] = book
+            bucket = by_year.get(book.year)
+            if bucket is None:
+                bucket = by_year[book.year] = {}
+            bucket[isbn] = book
+            added += 1
+        self._count += added
+    
+    @staticmethod
+    def _discard(index: dict, key, isbn: str) -> None:
+        bucket = index[key]
+        del bucket[isbn]
+        if not bucket:
+            del index[key]
+    
+    def remove_book(self, book: Book) -> None:
+        bucket = self._by_author.get(book.author)
+        if bucket is None or book.isbn not in bucket:
+            return
+        self._discard(self._by_author, book.author, book.isbn)
+        self._discard(self._by_genre, book.genre, book.isbn)
+        self._discard(self._by_year, book.year, book.isbn)
+        self._count -= 1
+    
+    def rebuild(self, author_index: dict, year_index: dict, genre_index: dict) -> None:
+        """Собрать заново из корзин IndexDict"""
+        def available(index: dict) -> dict:
+            result = {}
+            for key, bucket in index.items():
+                books = {isbn: book for isbn, book in bucket.items() if book.is_available}
+                if books:
+                    result[key] = books
+            return result
+        
+        self._by_author = available(author_index)
+        self._by_genre = available(genre_index)
+        self._by_year = available(year_index)
+        self._count = sum(len(bucket) for bucket in self._by_author.values())
+    
+    def clear(self) -> None:
+        self._by_author.clear()
+        self._by_genre.clear()
+        self._by_year.clear()
+        self._count = 0
+    
+    def by_author(self, author: str) -> List[Book]:
+        return list(self._by_author.get(author, {}).values())
+    
+    def by_genre(self, genre: str) -> List[Book]:
+        return list(self._by_genre.get(genre, {}).values())
+    
+    def by_year(self, year: int) -> List[Book]:
+        return list(self._by_year.get(year, {}).values())
+    
+    def by_years(self, years: Iterable[int]) -> List[Book]:
+        result = []
+        for year in years:
+            bucket = self._by_year.get(year)
+            if bucket:
+                result.extend(bucket.values())
+        return result
+
+
 class IndexDict:
     """
     Пользовательская словарная коллекция книг.
-    Индексирует книги по ISBN, автору, году.
+    Индексирует книги по ISBN, автору, году и жанру,
+    названия - через TitleIndex, доступные книги - через
+    AvailabilityIndex.
+
+    Корзины автора, года и жанра - словари ISBN -> книга: добавление и
+    удаление за O(1), а порядок выдачи совпадает с порядком добавления.
+    Отсортированный список годов позволяет делать запросы по диапазону
+    через bisect.
     """
-    def __init__(self):
+    def __init__(self, events: Optional[EventSink] = None):
+        self._events = events if events is not None else ConsoleSink()
         self._isbn_index: dict[str, Book] = {}
-        self._author_index: dict[str, List[Book]] = {}
-        self._year_index: dict[int, List[Book]] = {}
+        self._author_index: dict[str, dict[str, Book]] = {}
+        self._year_index: dict[int, dict[str, Book]] = {}
+        self._sorted_years: List[int] = []
+        self._genre_index: dict[str, dict[str, Book]] = {}
+        self._title_index = TitleIndex()
+        self._available = AvailabilityIndex()
     
     def __getitem__(self, key: Union[str, int]) -> Union[Book, List[Book]]:
         if isinstance(key, str) and key in self._isbn_index:
             return self._isbn_index[key]
         
         if isinstance(key, str) and key in self._author_index:
-            return self._author_index[key]
+            return list(self._author_index[key].values())
         
         if isinstance(key, int):
-            return self._year_index.get(key, [])
+            return list(self._year_index.get(key, {}).values())
         
         raise KeyError(f"Ключ '{key}' не найден в индексах")
     
@@ -83,7 +401,8 @@ class IndexDict:
     def __repr__(self) -> str:
         return (f"IndexDict(книг: {len(self)}, "
                 f"авторов: {len(self._author_index)}, "
-                f"лет: {len(self._year_index)})")
+                f"лет: {len(self._year_index)}, "
+                f"жанров: {len(self._genre_index)})")
     
     def __contains__(self, item: Union[str, Book]) -> bool:
         if isinstance(item, str):
@@ -94,40 +413,104 @@ class IndexDict:
     
     def add_book(self, book: Book) -> bool:
         if book.isbn in self._isbn_index:
-            print(f"Книга с ISBN {book.isbn} уже существует в индексе")
+            self._events.emit(WARNING, 'duplicate_isbn',
+                              "Книга с ISBN {isbn} уже существует в индексе",
+                              isbn=book.isbn)
             return False
         
         self._isbn_index[book.isbn] = book
         
         if book.author not in self._author_index:
-            self._author_index[book.author] = []
-        self._author_index[book.author].append(book)
+            self._author_index[book.author] = {}
+        self._author_index[book.author][book.isbn] = book
         
         if book.year not in self._year_index:
-            self._year_index[book.year] = []
-        self._year_index[book.year].append(book)
+            self._year_index[book.year] = {}
+            insort(self._sorted_years, book.year)
+        self._year_index[book.year][book.isbn] = book
+        
+        if book.genre not in self._genre_index:
+            self._genre_index[book.genre] = {}
+        self._genre_index[book.genre][book.isbn] = book
+        
+        self._title_index.add_book(book)
+        self._available.add_book(book)
         
         return True
     
+    def add_books(self, books: Iterable[Book]) -> List[Book]:
+        """
+        Пакетное построение индексов без печати на каждую книгу.
+        Книги с уже проиндексированным ISBN (в том числе повторы
+        внутри пачки) пропускаются; возвращает добавленные книги.
+        """
+        isbn_index = self._isbn_index
+        author_index = self._author_index
+        year_index = self._year_index
+        genre_index = self._genre_index
+        years_before = len(year_index)
+        added = []
+        
+        for book in books:
+            isbn = book.isbn
+            if isbn in isbn_index:
+                continue
+            isbn_index[isbn] = book
+            added.append(book)
+            
+            bucket = author_index.get(book.author)
+            if bucket is None:
+                bucket = author_index[book.author] = {}
+            bucket[isbn] = book
+            
+            bucket = year_index.get(book.year)
+            if bucket is None:
+                bucket = year_index[book.year] = {}
+            bucket[isbn] = book
+            
+            bucket = genre_index.get(book.genre)
+            if bucket is None:
+                bucket = genre_index[book.genre] = {}
+            bucket[isbn] = book
+        
+        if len(year_index) != years_before:
+            self._sorted_years[:] = sorted(year_index)
+        
+        self._title_index.add_books(added)
+        self._available.add_books(added)
+        return added
+    
     def remove_book(self, book: Book) -> bool:
-        if book.isbn not in self._isbn_index:
+        # удаляется именно эта книга, а не другая с тем же ISBN
+        if self._isbn_index.get(book.isbn) is not book:
             return False
         
         del self._isbn_index[book.isbn]
         
         if book.author in self._author_index:
             author_books = self._author_index[book.author]
-            author_books.remove(book)
+            author_books.pop(book.isbn, None)
             
             if not author_books:
                 del self._author_index[book.author]
         
         if book.year in self._year_index:
             year_books = self._year_index[book.year]
-            year_books.remove(book)
+            year_books.pop(book.isbn, None)
             
             if not year_books:
                 del self._year_index[book.year]
+                del self._sorted_years[bisect_left(self._sorted_years, book.year)]
+        
+        if book.genre in self._genre_index:
+            genre_books = self._genre_index[book.genre]
+            genre_books.pop(book.isbn, None)
+            
+            if not genre_books:
+                del self._genre_index[book.genre]
+        
+        self._title_index.remove_book(book)
+        self._available.remove_book(book)
         
         return True
     
@@ -135,19 +518,69 @@ class IndexDict:
         self._isbn_index.clear()
         self._author_index.clear()
         self._year_index.clear()
+        self._sorted_years.clear()
+        self._genre_index.clear()
+        self._title_index.clear()
+        self._available.clear()
         
-        for book in collection:
-            self.add_book(book)
+        self.add_books(collection)
         
-        print(f"Индексы перестроены. Добавлено {len(collection)} книг")
+        self._events.emit(INFO, 'index_rebuilt',
+                          "Индексы перестроены. Добавлено {count} книг",
+                          count=len(collection))
     
     def search_by_genre(self, genre: str) -> List[Book]:
+        return list(self._genre_index.get(genre, {}).values())
+    
+    def _years_in_range(self, start: int, end: int) -> List[int]:
+        low = bisect_left(self._sorted_years, start)
+        high = bisect_right(self._sorted_years, end)
+        return self._sorted_years[low:high]
+    
+    def search_by_year_range(self, start: int, end: int) -> List[Book]:
+        """Книги с годом в [start, end], по возрастанию года"""
         result = []
-        for book in self:
-            if book.genre == genre:
-                result.append(book)
+        for year in self._years_in_range(start, end):
+            result.extend(self._year_index[year].values())
         return result
     
+    def count_by_year_range(self, start: int, end: int) -> int:
+        return sum(len(self._year_index[year])
+                   for year in self._years_in_range(start, end))
+    
+    def min_year(self) -> Optional[int]:
+        return self._sorted_years[0] if self._sorted_years else None
+    
+    def max_year(self) -> Optional[int]:
+        return self._sorted_years[-1] if self._sorted_years else None
+    
+    def search_by_title(self, keyword: str) -> List[Book]:
+        return self._title_index.search(keyword)
+    
+    def set_available(self, book: Book, available: bool) -> None:
+        """Перенести книгу в индекс доступных или убрать из него"""
+        if self._isbn_index.get(book.isbn) is not book:
+            return
+        if available:
+            self._available.add_book(book)
+        else:
+            self._available.remove_book(book)
+    
+    def available_by_author(self, author: str) -> List[Book]:
+        return self._available.by_author(author)
+    
+    def available_by_genre(self, genre: str) -> List[Book]:
+        return self._available.by_genre(genre)
+    
+    def available_by_year(self, year: int) -> List[Book]:
+        return self._available.by_year(year)
+    
+    def available_by_year_range(self, start: int, end: int) -> List[Book]:
+        return self._available.by_years(self._years_in_range(start, end))
+    
+    def count_available(self) -> int:
+        return len(self._available)
+    
     def get(self, key, default=None):
         try:
             return self[key]
@@ -0,0 +1,84 @@
+from book import Book
+from events import NullSink
+from library import Library
+
+
+def make_library() -> Library:
+    library = Library("Кэш", NullSink(), cache_size=64)
+    library.add_books([
+        Book("Война и мир", "Толстой", 1869, "Роман", "B-1"),
+        Book("Мёртвые души", "Гоголь", 1842, "Поэма", "B-2"),
+    ])
+    return library
+
+
+def counters(library: Library) -> tuple:
+    stats = library._cache.stats()
+    return stats['hits'], stats['misses'], stats['stale']
+
+
+def isbns(books) -> list:
+    return [book.isbn for book in books]
+
+
+def test_title_cache_hit_and_miss():
+    library = make_library()
+    assert isbns(library.search_by_title("ВОЙНА")) == ["B-1"]
+    assert counters(library) == (0, 1, 0)
+    assert isbns(library.search_by_title("ВОЙНА")) == ["B-1"]
+    assert counters(library) == (1, 1, 0)
+    assert isbns(library.search_by_title("души")) == ["B-2"]
+    assert counters(library) == (1, 2, 0)
+
+
+def test_title_write_invalidates_only_matching_trigrams():
+    library = make_library()
+    library.search_by_title("война")
+    library.search_by_title("души")
+    library.search_by_title("ми")
+    
+    # в названии нет триграмм «война» и «души»: их записи остаются в кэше,
+    # а короткий запрос зависит от всех названий
+    library.add_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-3"))
+    hits, misses, stale = counters(library)
+    assert isbns(library.search_by_title("война")) == ["B-1"]
+    assert isbns(library.search_by_title("души")) == ["B-2"]
+    assert counters(library) == (hits + 2, misses, stale)
+    assert isbns(library.search_by_title("ми")) == ["B-1"]
+    assert counters(library) == (hits + 2, misses + 1, stale + 1)
+    
+    # запись названия с запросом внутри делает запись устаревшей
+    library.add_book(Book("Новая ВОЙНА", "Автор", 2000, "Роман", "B-4"))
+    hits, misses, stale = counters(library)
+    assert isbns(library.search_by_title("война")) == ["B-1", "B-4"]
+    assert counters(library) == (hits, misses + 1, stale + 1)
+    assert isbns(library.search_by_title("души")) == ["B-2"]
+    assert counters(library) == (hits + 1, misses + 1, stale + 1)
+    
+    library.remove_book("B-4")
+    hits, misses, stale = counters(library)
+    assert isbns(library.search_by_title("война")) == ["B-1"]
+    assert counters(library) == (hits, misses + 1, stale + 1)
+
+
+def test_genre_scope_is_separate():
+    library = make_library()
+    library.search_by_genre("Роман")
+    library.search_by_genre("Поэма")
+    library.add_book(Book("Воскресение", "Толстой", 1899, "Роман", "B-5"))
+    
+    hits, misses, stale = counters(library)
+    assert isbns(library.search_by_genre("Поэма")) == ["B-2"]
+    assert counters(library) == (hits + 1, misses, stale)
+    assert isbns(library.search_by_genre("Роман")) == ["B-1", "B-5"]
+    assert counters(library) == (hits + 1, misses + 1, stale + 1)
+
+
+def test_large_batch_invalidates_all_titles():
+    library = make_library()
+    library.search_by_title("души")
+    library.add_books([Book(f"Сборник {i}", "Автор", 2000, "Проза", f"S-{i}")
+                       for i in range(Library._TITLE_BUMP_LIMIT + 1)])
+    hits, misses, stale = counters(library)
+    assert isbns(library.search_by_title("души")) == ["B-2"]
+    assert counters(library) == (hits, misses + 1, stale + 1)
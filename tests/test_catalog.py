@@ -0,0 +1,134 @@
+import random
+from datetime import date
+
+import pytest
+
+from book import Book, LibraryBook, EBook
+from catalog import MappedCatalog, _HEADER, _RECORD
+from events import NullSink
+from library import Library
+
+
+AUTHORS = ["Толстой", "Чехов", "Гоголь", "Åberg", "Zola", "Я"]
+
+
+def same(left: Book, right: Book) -> bool:
+    fields = ('title', 'author', 'year', 'genre', 'isbn', 'is_available', 'date_added')
+    if type(left) is not type(right):
+        return False
+    if isinstance(left, LibraryBook):
+        fields += ('inventory_number', 'shelf_location', 'is_borrowed', 'current_borrower')
+    elif isinstance(left, EBook):
+        fields += ('file_size_mb', 'format_type', 'download_count')
+    return all(getattr(left, name) == getattr(right, name) for name in fields)
+
+
+@pytest.fixture
+def library():
+    rng = random.Random(1)
+    library = Library("Каталог", NullSink())
+    books = []
+    for i in range(500):
+        args = (f"Книга №{i} «{rng.choice('абвгд')}»", rng.choice(AUTHORS), rng.randint(-50, 2020),
+                rng.choice(["Роман", "Повесть"]), f"{rng.choice(['978', 'ISBN-', 'Б'])}{i}")
+        kind = i % 3
+        if kind == 1:
+            books.append(LibraryBook(*args, f"INV-{i}", f"Полка {i % 7}", date_added=date(2020, 1, 1 + i % 28)))
+        elif kind == 2:
+            books.append(EBook(*args, round(rng.uniform(0.1, 50), 2), rng.choice(["PDF", "EPUB"])))
+        else:
+            books.append(Book(*args))
+    library.add_books(books)
+    for book in books[1::6]:
+        book.borrow(f"Читатель {rng.randint(1, 5)}")
+    for book in books[2::9]:
+        book.download("u1")
+    return library
+
+
+@pytest.fixture
+def catalog(library, tmp_path):
+    path = str(tmp_path / 'catalog.bin')
+    assert library.save_catalog(path) == len(library)
+    with Library.open_catalog(path) as catalog:
+        yield catalog
+
+
+def test_round_trip(library, catalog):
+    books = list(library.get_all_books())
+    assert len(catalog) == len(books)
+    assert all(same(left, right) for left, right in zip(catalog, books))
+
+
+def test_isbn_search(library, catalog):
+    for book in library.get_all_books():
+        assert same(catalog.search_by_isbn(book.isbn), book)
+        assert book.isbn in catalog
+    for missing in ["", "0", "978", "Б9999", "zzz"]:
+        assert catalog.search_by_isbn(missing) is None
+        assert missing not in catalog
+
+
+def test_author_and_year_search(library, catalog):
+    for author in AUTHORS + ["", "Толсто", "Толстой ", "Ё"]:
+        expected = library.search_by_author(author)
+        assert [book.isbn for book in catalog.search_by_author(author)] == [book.isbn for book in expected]
+    
+    for year in [-50, -1, 0, 1000, 2020, 2021]:
+        expected = library.search_by_year(year)
+        assert [book.isbn for book in catalog.search_by_year(year)] == [book.isbn for book in expected]
+    
+    for start, end in [(-100, 3000), (0, 0), (1900, 1950), (1950, 1900), (2021, 2100)]:
+        found = catalog.search_by_year_range(start, end)
+        expected = library.search_by_year_range(start, end)
+        assert sorted(book.isbn for book in found) == sorted(book.isbn for book in expected)
+        assert [book.year for book in found] == sorted(book.year for book in found)
+    
+    result = catalog.search_by_author("Чехов")
+    assert [book.isbn for book in result[1:4]] == [book.isbn for book in list(result)[1:4]]
+
+
+def test_layout(catalog, tmp_path):
+    with open(catalog.path, 'rb') as f:
+        data = f.read()
+    magic, count, _, *offsets = _HEADER.unpack_from(data, 0)
+    sections = offsets[:10]
+    assert magic == b'LIBCAT1\0' and count == len(catalog)
+    assert sections == sorted(sections) and all(offset % 8 == 0 for offset in sections)
+    assert sections[3] - sections[2] >= count * _RECORD.size
+
+
+def test_empty_catalog(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    assert Library("Пусто", NullSink()).save_catalog(path) == 0
+    with MappedCatalog(path) as catalog:
+        assert len(catalog) == 0
+        assert list(catalog) == []
+        assert catalog.search_by_isbn("1") is None
+        assert len(catalog.search_by_author("Толстой")) == 0
+        assert len(catalog.search_by_year_range(0, 3000)) == 0
+        assert catalog.get_random_book() is None
+
+
+@pytest.mark.parametrize('content', [b'', b'LIB', b'NOTACATALOG' * 20])
+def test_not_a_catalog(tmp_path, content):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        MappedCatalog(str(path))
+
+
+def test_closed_catalog(library, tmp_path):
+    path = str(tmp_path / 'catalog.bin')
+    library.save_catalog(path)
+    catalog = MappedCatalog(path)
+    result = catalog.search_by_author("Толстой")
+    catalog.close()
+    
+    with pytest.raises(ValueError, match="закрыт"):
+        list(result)
+    with pytest.raises(ValueError, match="закрыт"):
+        catalog.search_by_isbn("9780")
+    with pytest.raises(ValueError, match="закрыт"):
+        catalog.search_by_year(2000)
+    catalog.close()
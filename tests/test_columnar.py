@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+import columnar
+from book import Book, LibraryBook, EBook
+from columnar import ColumnarCatalog
+from events import NullSink
+from library import Library
+
+
+AUTHORS = ["Толстой", "Чехов", "Гоголь"]
+GENRES = ["Роман", "Повесть"]
+TYPES = [None, Book, LibraryBook, EBook, str]
+
+
+def make_book(rng, i):
+    args = (f"Книга {i}", rng.choice(AUTHORS), rng.randint(1830, 1900), rng.choice(GENRES), f"C-{i}")
+    kind = i % 3
+    if kind == 1:
+        return LibraryBook(*args, f"INV-{i}", "A-1")
+    if kind == 2:
+        return EBook(*args, 1.0, "PDF")
+    return Book(*args)
+
+
+def random_criteria(rng):
+    year_from = rng.choice([None, 1850, 1870])
+    return dict(year_from=year_from,
+                year_to=rng.choice([None, 1860, 1890]),
+                author=rng.choice([None, *AUTHORS, "Нет такого"]),
+                genre=rng.choice([None, *GENRES]),
+                book_type=rng.choice(TYPES),
+                available=rng.choice([None, True, False]))
+
+
+def brute_force(books, year_from, year_to, author, genre, book_type, available):
+    return [book.isbn for book in books
+            if (year_from is None or book.year >= year_from)
+            and (year_to is None or book.year <= year_to)
+            and (author is None or book.author == author)
+            and (genre is None or book.genre == genre)
+            and (book_type is None or type(book) is book_type)
+            and (available is None or book.is_available == available)]
+
+
+@pytest.fixture
+def library():
+    rng = random.Random(1)
+    library = Library("Колонки", NullSink())
+    library.add_books(make_book(rng, i) for i in range(300))
+    library.enable_columnar()
+    return library
+
+
+def mutate(library, rng):
+    """Добавление, удаление, выдача, возврат и скачивание после enable_columnar"""
+    for i in range(300, 2000):
+        library.add_book(make_book(rng, i))
+    books = list(library.get_all_books())
+    for book in rng.sample(books, 1500):
+        library.remove_book(book)
+    for book in library.get_all_books():
+        if isinstance(book, LibraryBook) and rng.random() < 0.5:
+            book.borrow("Иванов")
+        elif isinstance(book, EBook):
+            book.download("u1")
+    for book in library.books_borrowed_by("Иванов")[::3]:
+        book.return_book()
+
+
+def test_stays_in_sync_with_library(library):
+    rng = random.Random(2)
+    mutate(library, rng)
+    books = list(library.get_all_books())
+    assert len(library.columnar) == len(books)
+    for _ in range(300):
+        criteria = random_criteria(rng)
+        expected = brute_force(books, **criteria)
+        found = library.filter_books(**criteria)
+        assert sorted(book.isbn for book in found) == sorted(expected)
+        assert all(library.search_by_isbn(book.isbn) is book for book in found)
+        assert library.count_books(**criteria) == len(expected)
+    
+    copies = {book.isbn: book for book in library.columnar.filter()}
+    for book in books:
+        copy = copies[book.isbn]
+        assert copy.is_available == book.is_available
+        if isinstance(book, LibraryBook):
+            assert copy.current_borrower == book.current_borrower
+        if isinstance(book, EBook):
+            assert copy.download_count == book.download_count
+
+
+def test_numpy_and_python_paths_agree(library):
+    pytest.importorskip('numpy')
+    rng = random.Random(3)
+    mutate(library, rng)
+    catalog = library.columnar
+    for _ in range(300):
+        criteria = catalog._criteria(**random_criteria(rng))
+        if criteria is None:
+            continue
+        assert catalog._select_numpy(criteria) == catalog._select_python(criteria)
+
+
+def test_python_path_without_numpy(library, monkeypatch):
+    monkeypatch.setattr(columnar, 'np', None)
+    rng = random.Random(4)
+    books = list(library.get_all_books())
+    for _ in range(100):
+        criteria = random_criteria(rng)
+        assert library.count_books(**criteria) == len(brute_force(books, **criteria))
+
+
+def test_requires_enable():
+    library = Library("Колонки", NullSink())
+    with pytest.raises(ValueError):
+        library.filter_books(author="Толстой")
+    assert len(ColumnarCatalog.from_books([])) == 0
@@ -0,0 +1,82 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from book import Book, LibraryBook
+from concurrent_library import ConcurrentLibrary
+from events import NullSink
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(targets, seconds=None):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    if seconds is not None:
+        time.sleep(seconds)
+    return threads
+
+
+@pytest.mark.parametrize('cache_size', [0, 64])
+def test_title_search_during_writes(fast_switching, cache_size):
+    library = ConcurrentLibrary("Потоки", NullSink(), cache_size=cache_size)
+    library.add_books([Book(f"Слово {i}", "Автор", 2000, "Роман", f"S-{i}") for i in range(500)])
+    stop = threading.Event()
+    errors = []
+    
+    def writer():
+        batch = 0
+        while not stop.is_set():
+            library.add_books([Book(f"Новое {batch} {i}", "Автор", 2000, "Роман", f"N-{batch}-{i}")
+                               for i in range(10)])
+            batch += 1
+    
+    def reader():
+        while not stop.is_set():
+            try:
+                library.search_by_title("ово")
+                library.query(title_contains="новое")
+            except Exception as e:
+                errors.append(e)
+    
+    threads = run_threads([writer] + [reader] * 4, seconds=1)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len(library.search_by_title("Новое")) == len(library) - 500
+
+
+def test_book_is_borrowed_once(fast_switching):
+    library = ConcurrentLibrary("Потоки", NullSink())
+    books = [LibraryBook(f"Книга {i}", "Автор", 2000, "Роман", f"L-{i}", f"INV-{i}", "A-1")
+             for i in range(200)]
+    library.add_books(books)
+    wins = [0] * len(books)
+    lock = threading.Lock()
+    
+    def borrower(name):
+        def run():
+            for position, book in enumerate(books):
+                if book.borrow(name).endswith(f"выдана {name}"):
+                    with lock:
+                        wins[position] += 1
+        return run
+    
+    threads = run_threads([borrower(f"Читатель {n}") for n in range(6)])
+    for thread in threads:
+        thread.join()
+    
+    assert wins == [1] * len(books)
+    assert library.count_on_loan() == len(books)
+    assert library.available_by_author("Автор") == []
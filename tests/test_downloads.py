@@ -0,0 +1,31 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from downloads import DownloadTracker
+
+
+def test_finished_threads_leave_no_shards():
+    tracker = DownloadTracker(top_n=3, merge_every=1000)
+    
+    def work():
+        for i in range(10):
+            tracker.record(f"E-{i % 4}")
+    
+    for _ in range(50):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    with ThreadPoolExecutor(4) as pool:
+        for _ in range(20):
+            pool.submit(work)
+    
+    assert tracker._shards == []
+    assert tracker.total == 700
+    assert tracker.top(2) == [("E-0", 210), ("E-1", 210)]
+
+
+def test_live_thread_keeps_unmerged_counts():
+    tracker = DownloadTracker(merge_every=1000)
+    tracker.record("E-1", 2)
+    assert len(tracker._shards) == 1
+    assert tracker.count("E-1") == 2
@@ -0,0 +1,131 @@
+import os
+import time
+
+import pytest
+
+from book import Book, LibraryBook
+from events import NullSink
+from journal import Journal
+from library import Library
+
+
+def isbns(library: Library) -> list:
+    return [book.isbn for book in library.get_all_books()]
+
+
+def recover(tmp_path, **journal_options) -> Library:
+    return Library.recover(str(tmp_path / 'library.snap'), str(tmp_path / 'library.log'),
+                           events=NullSink(), **journal_options)
+
+
+def test_replay_restores_operations(tmp_path):
+    library = recover(tmp_path)
+    library.add_book(Book("Война и мир", "Толстой", 1869, "Роман", "B-1"))
+    library.add_books([LibraryBook("Идиот", "Достоевский", 1869, "Роман", "L-1", "INV-1", "A-1"),
+                       Book("Нос", "Гоголь", 1836, "Повесть", "B-2")])
+    library.search_by_isbn("L-1").borrow("Иванов")
+    library.remove_book("B-2")
+    library._journal.close()
+    
+    restored = recover(tmp_path)
+    assert isbns(restored) == ["B-1", "L-1"]
+    assert restored.search_by_isbn("L-1").current_borrower == "Иванов"
+    assert restored.get_loan("L-1").since == library.get_loan("L-1").since
+    restored._journal.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    library = recover(tmp_path, group_size=1)
+    library.add_book(Book("Война и мир", "Толстой", 1869, "Роман", "B-1"))
+    library.add_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-2"))
+    library._journal.close()
+    
+    path = str(tmp_path / 'library.log')
+    intact = os.path.getsize(path)
+    # сбой посреди записи последнего кадра
+    with open(path, 'r+b') as f:
+        f.truncate(intact - 3)
+    
+    restored = recover(tmp_path, group_size=1)
+    assert isbns(restored) == ["B-1"]
+    assert os.path.getsize(path) < intact - 3
+    # новые записи ложатся сразу за последним целым кадром
+    restored.add_book(Book("Идиот", "Достоевский", 1869, "Роман", "B-3"))
+    restored._journal.close()
+    
+    assert isbns(recover(tmp_path)) == ["B-1", "B-3"]
+
+
+def test_replay_after_compaction(tmp_path):
+    library = recover(tmp_path)
+    library.add_book(Book("Война и мир", "Толстой", 1869, "Роман", "B-1"))
+    library.compact_journal(str(tmp_path / 'library.snap'))
+    assert library._journal.size() == 0
+    library.add_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-2"))
+    library._journal.close()
+    
+    restored = recover(tmp_path)
+    assert isbns(restored) == ["B-1", "B-2"]
+    assert restored._journal_seq == 2
+    restored._journal.close()
+
+
+def test_records_in_snapshot_are_skipped(tmp_path):
+    # сбой после замены снимка, но до очистки журнала: записи есть и там, и там
+    library = recover(tmp_path)
+    library.add_book(Book("Война и мир", "Толстой", 1869, "Роман", "B-1"))
+    library.add_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-2"))
+    library._journal.sync()
+    library.save_snapshot(str(tmp_path / 'library.snap'))
+    library.add_book(Book("Идиот", "Достоевский", 1869, "Роман", "B-3"))
+    library._journal.close()
+    
+    restored = recover(tmp_path)
+    assert isbns(restored) == ["B-1", "B-2", "B-3"]
+    assert restored._journal_seq == 3
+    restored._journal.close()
+
+
+def test_group_flushed_by_deadline(tmp_path):
+    path = str(tmp_path / 'library.log')
+    journal = Journal(path, group_size=64, group_interval=0.05)
+    try:
+        journal.append(1, 'remove', ("B-1",))
+        assert journal.size() == 0
+        deadline = time.monotonic() + 5
+        while journal.syncs == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert journal.syncs == 1
+        assert journal.size() > 0
+    finally:
+        journal.close()
+    
+    with Journal(path) as reopened:
+        assert [record[0] for record in reopened.records()] == [1]
+
+
+def test_attach_requires_replayed_journal(tmp_path):
+    path = str(tmp_path / 'library.log')
+    library = Library("Журнал", NullSink())
+    with Journal(path) as journal:
+        assert journal.last_seq == 0
+        library.attach_journal(journal)
+        library.add_book(Book("Война и мир", "Толстой", 1869, "Роман", "B-1"))
+        library.add_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-2"))
+        assert journal.last_seq == 2
+    
+    with Journal(path) as reopened:
+        assert reopened.last_seq == 2
+        fresh = Library("Журнал", NullSink())
+        with pytest.raises(ValueError, match="replay_journal"):
+            fresh.attach_journal(reopened)
+        
+        fresh.replay_journal(reopened)
+        fresh.attach_journal(reopened)
+        fresh.remove_book("B-1")
+        assert reopened.last_seq == 3
+    
+    restored = recover(tmp_path)
+    assert isbns(restored) == ["B-2"]
+    assert restored._journal_seq == 3
+    restored._journal.close()
@@ -0,0 +1,77 @@
+import copy
+import pickle
+
+from book import Book, LibraryBook, EBook
+from events import NullSink, RecordSink
+from library import Library
+
+
+def test_remove_other_book_with_same_isbn():
+    events = RecordSink()
+    library = Library("Удаление", events)
+    original = Book("Война и мир", "Толстой", 1869, "Роман", "B-1")
+    library.add_book(original)
+    
+    assert not library.remove_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-1"))
+    assert 'sync_error' not in [record['event'] for record in events.records]
+    assert library.search_by_isbn("B-1") is original
+    assert library.search_by_author("Толстой") == [original]
+    
+    assert not library.add_book(Book("Нос", "Гоголь", 1836, "Повесть", "B-1"))
+    assert list(library.get_all_books()) == [original]
+    assert library.remove_book(original)
+    assert len(library) == 0 and library.search_by_isbn("B-1") is None
+
+
+def test_remove_by_isbn():
+    library = Library("Удаление", NullSink())
+    library.add_book(Book("Война и мир", "Толстой", 1869, "Роман", "B-1"))
+    assert library.remove_book("B-1")
+    assert not library.remove_book("B-1")
+    assert library.search_by_author("Толстой") == []
+
+
+def test_book_copies_are_detached():
+    library = Library("Копии", NullSink())
+    book = LibraryBook("Идиот", "Достоевский", 1869, "Роман", "L-1", "INV-1", "A-1")
+    ebook = EBook("Нос", "Гоголь", 1836, "Повесть", "E-1", 1.5, "PDF")
+    library.add_books([book, ebook])
+    book.borrow("Иванов")
+    ebook.download("u1")
+    
+    for clone in (pickle.loads(pickle.dumps(book)), copy.deepcopy(book), copy.copy(book)):
+        assert clone._library is None
+        assert (clone.isbn, clone.is_borrowed, clone.current_borrower) == ("L-1", True, "Иванов")
+        # копия с тем же ISBN не меняет книгу библиотеки
+        assert clone.return_book() == "Книга 'Идиот' возвращена от Иванов"
+        assert book.is_borrowed and library.count_on_loan() == 1
+    
+    clone = copy.deepcopy(ebook)
+    assert clone._library is None and clone.download_count == 1
+    clone.download("u2")
+    assert ebook.download_count == 1 and library.top_downloaded(1)[0] is ebook
+    
+    forged = copy.copy(book)
+    forged._library = library
+    assert forged.return_book() == "Книга 'Идиот' не найдена в библиотеке"
+    assert book.is_borrowed and library.count_on_loan() == 1
+
+
+def test_book_belongs_to_one_library():
+    events = RecordSink()
+    first, second = Library("Первая", NullSink()), Library("Вторая", events)
+    book = LibraryBook("Идиот", "Достоевский", 1869, "Роман", "L-1", "INV-1", "A-1")
+    other = Book("Нос", "Гоголь", 1836, "Повесть", "B-1")
+    first.add_book(book)
+    
+    assert not second.add_book(book)
+    assert 'book_in_other_library' in [record['event'] for record in events.records]
+    summary = second.add_books([book, other])
+    assert (summary['added'], summary['duplicates'], summary['foreign']) == (1, 0, 1)
+    assert book._library is first and second.search_by_isbn("L-1") is None
+    
+    book.borrow("Иванов")
+    assert first.count_on_loan() == 1 and second.count_on_loan() == 0
+    
+    first.remove_book(book)
+    assert second.add_book(book) and book._library is second
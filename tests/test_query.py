@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from book import Book, LibraryBook
+from events import NullSink
+from library import Library
+
+
+AUTHORS = ["Толстой", "Чехов", "Гоголь", "Пушкин"]
+GENRES = ["Роман", "Повесть", "Поэзия"]
+YEARS = [1830, 1840, 1869, 1877]
+WORDS = ["мир", "нос", "война", "дама", "сад"]
+
+
+def brute_force(library, author, year, genre, title_contains, available):
+    return [book for book in library.get_all_books()
+            if (author is None or book.author == author)
+            and (year is None or book.year == year)
+            and (genre is None or book.genre == genre)
+            and (title_contains is None or title_contains.lower() in book.title.lower())
+            and (available is None or book.is_available == available)]
+
+
+def random_criteria(rng):
+    return (rng.choice([None, *AUTHORS, "Нет такого"]), rng.choice([None, *YEARS, 1999]),
+            rng.choice([None, *GENRES]), rng.choice([None, *WORDS, "Ми", "xyz"]),
+            rng.choice([None, True, False]))
+
+
+def make_library(rng, size=300):
+    library = Library("Запросы", NullSink())
+    books = []
+    for i in range(size):
+        args = (f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}", rng.choice(AUTHORS),
+                rng.choice(YEARS), rng.choice(GENRES), f"Q-{i}")
+        books.append(LibraryBook(*args, f"INV-{i}", "A-1") if i % 2 else Book(*args))
+    library.add_books(books)
+    return library, [book for book in books if isinstance(book, LibraryBook)]
+
+
+def check(library, rng, rounds):
+    for _ in range(rounds):
+        criteria = random_criteria(rng)
+        expected = {book.isbn for book in brute_force(library, *criteria)}
+        assert {book.isbn for book in library.query(*criteria)} == expected, library.explain(*criteria)
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_query_matches_brute_force(seed):
+    rng = random.Random(seed)
+    library, library_books = make_library(rng)
+    for book in rng.sample(library_books, len(library_books) // 3):
+        book.borrow("Иванов")
+    for isbn in rng.sample([book.isbn for book in library.get_all_books()], 20):
+        library.remove_book(isbn)
+    check(library, rng, 400)
+
+
+def test_query_when_nothing_is_available():
+    rng = random.Random(3)
+    library, library_books = make_library(rng, size=60)
+    for book in list(library.get_all_books()):
+        if not isinstance(book, LibraryBook):
+            library.remove_book(book)
+    for book in library_books:
+        book.borrow("Иванов")
+    
+    assert library.query(author="Толстой", available=True) == []
+    assert library.query(year=1869, genre="Роман", available=True) == []
+    check(library, rng, 200)
+
+
+def test_query_on_empty_library():
+    library = Library("Пусто", NullSink())
+    assert library.query(author="Толстой", available=True) == []
+    assert library.query(genre="Роман", title_contains="мир", available=False) == []
+    assert library.query() == []
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from book import Book, LibraryBook
+from events import NullSink
+from library import Library
+from service import LibraryService
+
+
+@pytest.fixture
+def service():
+    library = Library("Сервис", NullSink())
+    library.add_books([
+        Book("Война и мир", "Толстой", 1869, "Роман", "B-1"),
+        LibraryBook("Идиот", "Достоевский", 1869, "Роман", "L-1", "INV-1", "A-1"),
+    ])
+    return LibraryService(library)
+
+
+def call(service, request) -> dict:
+    return json.loads(service.handle(json.dumps(request).encode('utf-8')))
+
+
+@pytest.mark.parametrize('op, args', [
+    ('search_by_title', {'keyword': 5}),
+    ('search_by_author', {'author': ["Толстой"]}),
+    ('search_by_isbn', {'isbn': None}),
+    ('search_by_year', {'year': "1869"}),
+    ('search_by_year', {'year': True}),
+    ('query', {'author': 1}),
+    ('query', {'available': "да"}),
+    ('borrow', {'isbn': "L-1", 'borrower': {}}),
+    ('add_book', {'book': {'title': 1, 'author': "А", 'year': 2000, 'genre': "Г", 'isbn': "X"}}),
+    ('search_by_author', {'author': "Толстой", 'limit': "10"}),
+    ('search_by_author', {'author': "Толстой", 'limit': -1}),
+    ('top_downloaded', {'n': -1}),
+])
+def test_bad_argument_types_are_rejected(service, op, args):
+    response = call(service, {'id': 7, 'op': op, 'args': args})
+    assert response['id'] == 7
+    assert response['ok'] is False
+    assert len(service.library) == 2
+
+
+def test_unexpected_error_becomes_response(service):
+    def broken(args):
+        raise AttributeError("сломано")
+    service._handlers['search_by_author'] = broken
+    response = call(service, {'id': 1, 'op': 'search_by_author', 'args': {'author': "Толстой"}})
+    assert response == {'id': 1, 'ok': False, 'error': "Внутренняя ошибка: сломано"}
+
+
+def test_bad_request_keeps_pipeline(service):
+    async def exchange():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        requests = [
+            {'id': 1, 'op': 'search_by_author', 'args': {'author': "Толстой"}},
+            {'id': 2, 'op': 'search_by_title', 'args': {'keyword': 5}},
+            {'id': 3, 'op': 'borrow', 'args': {'isbn': "L-1", 'borrower': "Иванов"}},
+        ]
+        writer.write(b''.join(json.dumps(request).encode('utf-8') + b'\n' for request in requests))
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in requests]
+        writer.close()
+        await service.close()
+        return responses
+    
+    first, second, third = asyncio.run(exchange())
+    assert first['ok'] and first['total'] == 1
+    assert second['id'] == 2 and not second['ok']
+    assert third['ok'] and third['result']['done']
+
+
+def test_zero_limit_returns_total_only(service):
+    response = call(service, {'id': 1, 'op': 'search_by_author',
+                              'args': {'author': "Толстой", 'limit': 0}})
+    assert response['ok'] and response['total'] == 1 and response['result'] == []
+
+
+def test_service_process_reports_port_in_file(tmp_path):
+    port_file = tmp_path / 'service.port'
+    log = tmp_path / 'service.log'
+    service = os.path.join(os.path.dirname(__file__), '..', 'src_work', 'service.py')
+    process = subprocess.Popen([sys.executable, service, '--port', '0', '--port-file', str(port_file),
+                                '--log', str(log)], stdout=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + 10
+        while not port_file.exists():
+            assert process.poll() is None and time.monotonic() < deadline
+            time.sleep(0.02)
+        port = int(port_file.read_text())
+        
+        async def request():
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'{"id": 1, "op": "count_on_loan"}\n')
+            response = json.loads(await reader.readline())
+            writer.close()
+            return response
+        
+        assert asyncio.run(request()) == {'id': 1, 'ok': True, 'result': 0}
+    finally:
+        process.terminate()
+        stdout, _ = process.communicate(timeout=10)
+    assert stdout == b''
@@ -0,0 +1,83 @@
+from datetime import date
+
+from book import Book, LibraryBook, EBook
+from events import NullSink
+from library import Library
+
+
+def make_library() -> Library:
+    library = Library("Снимок", NullSink())
+    library.add_books([
+        Book("Война и мир", "Толстой", 1869, "Роман", "B-1", date_added=date(2020, 1, 2)),
+        LibraryBook("Анна Каренина", "Толстой", 1877, "Роман", "L-1", "INV-1", "A-1"),
+        LibraryBook("Идиот", "Достоевский", 1869, "Роман", "L-2", "INV-2", "A-2"),
+        EBook("Нос", "Гоголь", 1836, "Повесть", "E-1", 1.5, "PDF"),
+    ])
+    library.search_by_isbn("L-1").borrow("Иванов")
+    library.search_by_isbn("E-1").download("u1")
+    return library
+
+
+def test_snapshot_round_trip(tmp_path):
+    library = make_library()
+    path = str(tmp_path / 'library.snap')
+    library.save_snapshot(path)
+    
+    restored = Library.load_snapshot(path, NullSink())
+    assert restored.name == library.name
+    assert [book.isbn for book in restored.get_all_books()] == \
+        [book.isbn for book in library.get_all_books()]
+    assert restored.search_by_isbn("B-1").date_added == date(2020, 1, 2)
+    assert [book.isbn for book in restored.search_by_author("Толстой")] == ["B-1", "L-1"]
+    assert [book.isbn for book in restored.search_by_year(1869)] == ["B-1", "L-2"]
+    assert [book.isbn for book in restored.search_by_title("анна")] == ["L-1"]
+    
+    borrowed = restored.search_by_isbn("L-1")
+    assert borrowed.is_borrowed and borrowed.current_borrower == "Иванов"
+    assert [book.isbn for book in restored.books_borrowed_by("Иванов")] == ["L-1"]
+    assert restored.get_loan("L-1").since == library.get_loan("L-1").since
+    assert {book.isbn for book in restored.available_by_author("Толстой")} == {"B-1"}
+    assert restored.search_by_isbn("E-1").download_count == 1
+    assert [book.isbn for book in restored.top_downloaded(1)] == ["E-1"]
+    
+    # восстановленные книги снова сообщают библиотеке о выдаче
+    borrowed.return_book()
+    assert restored.count_on_loan() == 0
+    assert {book.isbn for book in restored.available_by_author("Толстой")} == {"B-1", "L-1"}
+
+
+def test_snapshot_keeps_title_and_availability_indexes(tmp_path, monkeypatch):
+    from Сollection import TitleIndex, AvailabilityIndex
+    
+    library = make_library()
+    library.add_books([Book(f"Повесть о городе {i}", "Автор", 1900 + i % 5, "Повесть", f"X-{i}")
+                       for i in range(30)])
+    for i in range(0, 30, 3):
+        library.remove_book(library.search_by_isbn(f"X-{i}"))
+    path = str(tmp_path / 'library.snap')
+    library.save_snapshot(path)
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("индекс не должен перестраиваться при загрузке")
+    for cls, name in ((TitleIndex, '_index'), (TitleIndex, 'add_books'),
+                      (AvailabilityIndex, 'rebuild'), (AvailabilityIndex, 'add_books')):
+        monkeypatch.setattr(cls, name, fail)
+    restored = Library.load_snapshot(path, NullSink())
+    monkeypatch.undo()
+    
+    for keyword in ["городе", "о", "1", "ной", "анна", "нет такого"]:
+        assert [book.isbn for book in restored.search_by_title(keyword)] == \
+            [book.isbn for book in library.search_by_title(keyword)]
+    titles = restored._index._title_index
+    assert not titles._removed and len(titles._books) == len(titles) == len(library)
+    
+    available = restored._index._available
+    assert len(available) == len(library._index._available)
+    for genre in ["Роман", "Повесть"]:
+        assert {book.isbn for book in restored.available_by_genre(genre)} == \
+            {book.isbn for book in library.available_by_genre(genre)}
+    
+    # восстановленные индексы продолжают обновляться
+    restored.add_book(Book("Новый город", "Автор", 1901, "Повесть", "N-1"))
+    assert "N-1" in {book.isbn for book in restored.search_by_title("город")}
+    assert "N-1" in {book.isbn for book in restored.available_by_genre("Повесть")}
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from book import Book
+from Сollection import TitleIndex
+
+
+WORDS = ["Война", "мир", "Анна", "Каренина", "ИДИОТ", "ёж", "Ёлка", "и", "в", "the", "Old",
+         "man", "sea", "1984", "Мёртвые", "души", "a-b", "Чайка!"]
+KEYWORDS = ["", " ", "и", "ё", "Ё", "ми", "МИ", "а", "ка", "ра", "in", "1", "-", "!",
+            "мир", "МИР", "ёж", "ёлк", "ОТ ", "а к", "и в", "ина ", "war", "the old",
+            "sea 1", "мёртвые души", "каренина", "а-б", "a-b", "нет такого", "чайка!"]
+
+
+def brute_force(books, keyword):
+    return [book for book in books if keyword.lower() in book.title.lower()]
+
+
+def make_books(rng, count, start=0):
+    return [Book(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5))),
+                 "Автор", 2000, "Роман", f"T-{start + i}")
+            for i in range(count)]
+
+
+def check(index, books, keywords):
+    for keyword in keywords:
+        assert index.search(keyword) == brute_force(books, keyword), keyword
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_search_matches_substring(seed):
+    rng = random.Random(seed)
+    books = make_books(rng, 400)
+    index = TitleIndex()
+    index.add_books(books)
+    check(index, books, KEYWORDS)
+    
+    # случайные подстроки названий, в том числе через пробел
+    samples = []
+    for book in rng.sample(books, 50):
+        start = rng.randrange(len(book.title))
+        samples.append(book.title[start:start + rng.randint(1, 8)])
+    check(index, books, samples)
+
+
+def test_search_after_removal_and_compaction():
+    rng = random.Random(4)
+    books = make_books(rng, 3000)
+    index = TitleIndex()
+    index.add_books(books)
+    check(index, books, KEYWORDS[:10])
+    
+    for book in rng.sample(books, 2500):
+        index.remove_book(book)
+        books.remove(book)
+    assert index._removed < 2500
+    check(index, books, KEYWORDS)
+    
+    # пересоздание после удаления и добавление поверх
+    extra = make_books(rng, 200, start=3000) + [books[0]]
+    index.add_books(extra)
+    books.extend(extra[:-1])
+    check(index, books, KEYWORDS)
+    assert len(index) == len(books)
+
+
+def test_single_books():
+    index = TitleIndex()
+    first = Book("Ёжик в тумане", "Норштейн", 1975, "Сказка", "E-1")
+    index.add_book(first)
+    assert index.search("ЁЖИК В") == [first]
+    index.remove_book(first)
+    assert index.search("ёжик") == []
+    assert index.search("") == []
+    second = Book("Ёжик в тумане", "Норштейн", 1975, "Сказка", "E-1")
+    index.add_book(second)
+    assert index.search("туман") == [second]